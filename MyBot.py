@@ -1,25 +1,50 @@
 import hlt
-from hlt import helper
+from hlt import helper, instrument, spatial
 import logging
-import time
 import math
 from hlt.geom import Point, Seg, cent_of_mass
 from collections import OrderedDict
 from hlt.constants import *
 from hlt.entity import Position
+from hlt.budget import Budget
+from hlt.combat import Volley
+from hlt.targeting import MoveQueue
+from hlt.pathfinding import Graph, FlowField
+
+# Production turns logging off. Otherwise the log is written as records are made: the queued writer thread
+# costs more CPU per record than it takes off this thread (see testlogging)
+production = False
 
 # GAME START
-game = hlt.Game("Mu - 2sigma")
+game = hlt.Game("Mu - 2sigma", incremental=True, log='off' if production else 'file')
+# Coarse grid over the planets, with the way to every planet from every cell worked out up front, for
+# routing ships around the planets that stand between them and their target; a finer level of it routes
+# the ships nav still cannot get through
+graph = Graph(game.initial_map, size=4)
+fields = {p.id: FlowField(graph, p) for p in game.initial_map.all_planets()}
 turn = 0
 rush_policy = False
 rush_policy_num_players_max = 2
 rush_policy_dis_players_max = 12 * hlt.constants.MAX_SPEED
+# Write a JSON line of timers and counters per turn to <tag>_turns.jsonl; a number adds that many cProfile entries
+record_turns = False
+record_profile = 0
+if record_turns:
+    instrument.activate(instrument.Recorder(open("{}_turns.jsonl".format(game.map.my_id), 'w'), record_profile))
 
 while True:
-    start_time = time.process_time()
+    if instrument.active():
+        instrument.active().begin_turn(turn)
+    budget = Budget(1.9)
+    budget.phase('parse')
     gmap = game.update_map()
 
-    logging.info("TURN {}".format(turn))
+    logging.info("TURN %d", turn)
+    me = gmap.get_me()
+    is_en_uship = spatial.ships(enemy_of=me, undocked=True)
+    is_en_dship = spatial.ships(enemy_of=me, undocked=False)
+    is_my_uship = spatial.ships(owner=me, undocked=True)
+    is_my_dship = spatial.ships(owner=me, undocked=False)
 
     # Pre-process stage, decide if we want to rush or execute our default policy
     if turn == 0:
@@ -35,71 +60,69 @@ while True:
         doomed = True
 
     # Execute out strategy
+    budget.phase('threats')
     #HANDLE ATKS AT T=0
-    has_atked = set()
-    for s in gmap.all_uships():
-        atks = []
-        for t in gmap.all_ships():
-            if s.owner != t.owner and s.dist_to(t) < WEAPON_RADIUS:
-                atks.append(t)
-
-        if atks:
-            has_atked.add(s)
-            for t in atks:
-                t.hp -= WEAPON_DAMAGE/len(atks)
-                if t.hp <= 0:
-                    gmap.remove_ship(t)
+    volley = Volley(gmap.snapshot())
+    has_atked = set(volley.fired_ships())
+    for t, hp in volley.damaged_ships():
+        t.hp = hp
+    for t in volley.dead_ships():
+        gmap.remove_ship(t)
 
     #THREAT LEVEL CODE
     threat_level = {}
-    if gmap.my_dships():
-        for e in gmap.en_uships():
-            min_turns = helper.to_turns(min(map(lambda t:e.dist_to(s),gmap.my_dships()))-WEAPON_RADIUS)
+    snap = gmap.snapshot()
+    my_drows = snap.rows(gmap.my_dships())
+    if my_drows:
+        en_urows = snap.rows(gmap.en_uships())
+        for i, dists in zip(en_urows, snap.dist_matrix(en_urows, my_drows)):
+            min_turns = helper.to_turns(min(dists)-WEAPON_RADIUS)
             min_turns = max([0,min_turns])
             if min_turns < 1:
-                threat_level[e] = 1
+                threat_level[snap.entities[i]] = 1
 
     #OTHER INFO
     rem_dock = {p:p.rem_spots() for p in gmap.unowned_planets() + gmap.my_uplanets()}
     en_ship_assigned = {s:math.ceil(s.hp/WEAPON_DAMAGE) for s in gmap.en_ships()}
 
     #MOVE LIST WITH PRIORITIES
-    move_list = {}
+    budget.phase('scoring')
+    def move_cost(s, e):
+        if type(e) == hlt.entity.Planet:
+            d = helper.to_turns(s.dist_to(s.closest_pt_to(e))) + 2
+            if e.owner != gmap.get_me():
+                d += .5
+        else:
+            d = helper.to_turns(s.dist_to(e) - WEAPON_RADIUS)
+            if e in threat_level:
+                d -= threat_level[e]
+            elif not e.can_atk():
+                d -= 1
+        return d
+
+    # Pairs come out cheapest first; enemy ships are only scored once they could compete, since no
+    # adjustment makes a ship target more than one turn cheaper than its distance alone
+    unassigned = set(gmap.my_uships())
     b = [e for e in gmap.unowned_planets() + gmap.my_uplanets() if e.remaining_resources > 0]
-    for s in gmap.my_uships():
-        for e in b + gmap.en_ships():
-            if type(e) == hlt.entity.Planet:
-                if rush_policy == True:
-                    continue
-                d = helper.to_turns(s.dist_to(s.closest_pt_to(e))) + 2
-                if e.owner != gmap.get_me():
-                    d += .5
-            elif type(e) == hlt.entity.Ship:
-                d = helper.to_turns(s.dist_to(e) - WEAPON_RADIUS)
-                if e in threat_level:
-                    d -= threat_level[e]
-                elif not e.can_atk():
-                    d -= 1
-
-            move_list[(s,e)] = d
-
-
-    move_list = OrderedDict(sorted(move_list.items(), key=lambda t:t[1]))
+    targets = ([] if rush_policy else b) + list(gmap.en_ships())
+    move_list = MoveQueue(gmap.my_uships(), targets, move_cost, gmap.spatial(), gmap.en_ships(),
+                          lambda dist: helper.to_turns(dist - WEAPON_RADIUS) - 1, unassigned)
+    best_targ = move_list.first
 
     #ITERATE THROUGH MOVES
     move_table = {}
     first_targ = OrderedDict()
-    unassigned = set(gmap.my_uships())
 
-    logging.info("HALFWAY TIME: {}".format(time.process_time() - start_time))
+    logging.info("HALFWAY TIME: %s", budget.elapsed())
+    budget.phase('moves', reserve=.15)
 
     cmds = []
     for s in gmap.my_dships():
         if s.planet != None and s.planet.remaining_resources <= 0:
             cmds.append(s.undock())
 
-    for (s,e), d in move_list.items():
-        if time.process_time() - start_time > 1.9:
+    for s, e, d in move_list:
+        if budget.phase_expired():
             logging.info("TOOK WAY TOO MUCH TIME")
             break
 
@@ -119,7 +142,15 @@ while True:
                     rem_dock[e] -= 1
                     cmds.append(nav_cmd)
                 else:
-                    nav_cmd, move = helper.nav(s,s.closest_pt_to(e), gmap, None,move_table)
+                    waypoint = fields[e.id].waypoint(s.loc)
+                    if waypoint is None:
+                        nav_cmd, move = helper.nav(s,s.closest_pt_to(e), gmap, None,move_table)
+                    else:
+                        nav_cmd, move = helper.nav(s,Position(waypoint), gmap, None,move_table)
+                    if not nav_cmd:
+                        waypoints = graph.level(2).route(s.loc, e)
+                        if waypoints:
+                            nav_cmd, move = helper.nav(s,Position(waypoints[0]), gmap, None,move_table)
                     if nav_cmd:
                         rem_dock[e] -= 1
                         cmds.append(nav_cmd)
@@ -139,8 +170,8 @@ while True:
                             atk_pos = Position(move.p2)
                         else:
                             atk_pos = Position(s.loc, s.loc + Point.polar(MAX_SPEED,s.angle_to(e)))
-                        atk_ens = [t for t in gmap.en_uships() if t.dist_to(atk_pos) <= WEAPON_RADIUS + MAX_SPEED]
-                        atk_frs = [t for t in gmap.my_uships() if t.dist_to(atk_pos) <= MAX_SPEED+2]
+                        atk_ens = gmap.within(atk_pos.loc, WEAPON_RADIUS + MAX_SPEED, is_en_uship)
+                        atk_frs = gmap.within(atk_pos.loc, MAX_SPEED+2, is_my_uship)
                         if len(atk_frs) > len(atk_ens):
                             if nav_cmd:
                                 en_ship_assigned[e] -= 1
@@ -151,18 +182,18 @@ while True:
                             continue
 
                         # OTHER OPTIONS
-                        en_dships = sorted(gmap.en_dships(),key=lambda t:s.dist_to(t))
-                        my_dships = sorted(gmap.my_dships(),key=lambda t:e.dist_to(t))
+                        en_dships = gmap.nearest(s.loc, 1, is_en_dship)
+                        my_dships = gmap.nearest(e.loc, 1, is_my_dship)
                         my_dship = my_dships[0] if my_dships else None
                         en_dship = en_dships[0] if en_dships else None
 
-                        if time.process_time() - start_time > 1.9:
+                        if budget.phase_expired():
                             logging.info("TOOK WAY TOO MUCH TIME")
                             break
 
                         # HARASS
                         if en_dship != None and (my_dship == None or s.dist_to(en_dship)+7*(len(gmap.all_players()) - 1) < e.dist_to(my_dship)) and en_ship_assigned[en_dship] > 0:
-                            chasers = [t for t in gmap.en_uships() if s.dist_to(t) <= 2*MAX_SPEED+WEAPON_RADIUS]
+                            chasers = gmap.within(s.loc, 2*MAX_SPEED+WEAPON_RADIUS, is_en_uship)
                             nav_cmd, move = helper.harass_nav(s,en_dship,gmap,None,move_table,enemies=chasers)
                             if nav_cmd:
                                 cmds.append(nav_cmd)
@@ -172,25 +203,25 @@ while True:
                                 #logging.info("{} harass {}".format(s,en_dship))
                                 continue
 
-                        if time.process_time() - start_time > 1.9:
+                        if budget.phase_expired():
                             logging.info("TOOK WAY TOO MUCH TIME")
                             break
 
                         # DEFEND
                         if my_dship != None:
-                            def_frns = [t for t in gmap.my_uships() if t.dist_to(my_dship) <= MAX_SPEED + 3]
-                            def_ens = [t for t in gmap.en_uships() if t.dist_to(my_dship) <= MAX_SPEED + WEAPON_RADIUS]
-                            def_dfrns = [t for t in gmap.my_dships() if t.dist_to(my_dship) <= 3]
+                            def_frns = gmap.within(my_dship.loc, MAX_SPEED + 3, is_my_uship)
+                            def_ens = gmap.within(my_dship.loc, MAX_SPEED + WEAPON_RADIUS, is_en_uship)
+                            def_dfrns = gmap.within(my_dship.loc, 3, is_my_dship)
                             if e.dist_to(my_dship) <= WEAPON_RADIUS + MAX_SPEED and len(def_frns+def_dfrns) >= len(def_ens):
                                 #logging.info("{} defend {}".format(s,my_dship))
                                 pos = Position(my_dship.loc + Point.polar(.500001, my_dship.angle_to(e)+90))
                                 nav_cmd, move = helper.nav(s,pos,gmap,None,move_table)
                             else:
-                                enemies = [t for t in gmap.en_uships() if s.dist_to(t)<= MAX_SPEED*2 + WEAPON_RADIUS]
+                                enemies = gmap.within(s.loc, MAX_SPEED*2 + WEAPON_RADIUS, is_en_uship)
                                 enemies = sorted(enemies,key=lambda t:s.dist_to(t))
                                 en_cent = helper.cent_of_mass(enemies)
                                 if len(enemies) == 0:
-                                    logging.info("{} defend {}".format(s,e))
+                                    logging.info("%s defend %s", s, e)
                                 d = WEAPON_RADIUS+len(gmap.all_players())-2 - (s.dist_to(enemies[0]) - MAX_SPEED)
                                 dv = Point.polar(d, s.angle_to(en_cent))
                                 pos = Position(s.loc - dv)
@@ -203,12 +234,12 @@ while True:
                             unassigned.discard(s)
                             continue
 
-                        if time.process_time() - start_time > 1.9:
+                        if budget.phase_expired():
                             logging.info("TOOK WAY TOO MUCH TIME")
                             break
 
                     #FLEE
-                    enemies = [t for t in gmap.en_uships() if s.dist_to(t)<= MAX_SPEED*2 + WEAPON_RADIUS]
+                    enemies = gmap.within(s.loc, MAX_SPEED*2 + WEAPON_RADIUS, is_en_uship)
                     enemies = sorted(enemies,key=lambda t:s.dist_to(t))
                     en_cent = helper.cent_of_mass(enemies)
                     dv = Point.polar(MAX_SPEED, s.angle_to(en_cent))
@@ -222,7 +253,7 @@ while True:
 
                 # OUTSIDE POTENTIAL ATTACK RANGE
                 elif en_ship_assigned[e] > 0:
-                    if time.process_time() - start_time > 1.9:
+                    if budget.phase_expired():
                         logging.info("TOOK WAY TOO MUCH TIME")
                         break
                     nav_cmd, move = helper.nav(s,e,gmap,None,move_table)
@@ -233,7 +264,7 @@ while True:
                         move_table[s] = move
                     unassigned.discard(s)
         else:
-            enemies = [t for t in gmap.en_uships() if s.dist_to(t)<= MAX_SPEED*2 + WEAPON_RADIUS]
+            enemies = gmap.within(s.loc, MAX_SPEED*2 + WEAPON_RADIUS, is_en_uship)
             if len(enemies):
                 enemies = sorted(enemies,key=lambda t:s.dist_to(t))
                 en_cent = helper.cent_of_mass(enemies)
@@ -252,12 +283,16 @@ while True:
                 sorted(corners, key=lambda t:s.dist_to(t))
                 pos = corners[0]
 
-    for s in first_targ:
-        if time.process_time() - start_time > 1.9:
-            logging.info("TOOK WAY TOO MUCH TIME")
-            break
+    # FALLBACK: ships left without a move head for their best target with narrower sweeps as time runs
+    # out, and hold position once the turn's budget is gone
+    budget.phase('fallback')
+    for s in list(first_targ) + [t for t in best_targ if t not in first_targ]:
         if s in unassigned:
-            nav_cmd, move = helper.nav(s,s.closest_pt_to(first_targ[s]),gmap, None, move_table)
+            if budget.expired():
+                cmds.append(s.thrust(0, 0))
+                continue
+            nav_cmd, move = helper.nav(s,s.closest_pt_to(best_targ[s][1]),gmap, None, move_table,
+                                       max_deviation=budget.degrade(90, 10))
             if nav_cmd:
                 cmds.append(nav_cmd)
             if move:
@@ -266,11 +301,14 @@ while True:
     # Send out game commands
     game.send_command_queue(cmds)
 
+    budget.close()
+    if instrument.active():
+        instrument.active().end_turn()
     turn = turn + 1
-    elapsed_time = time.process_time() - start_time
+    elapsed_time = budget.elapsed()
     if elapsed_time >= .5:
-        logging.info("Time Elapsed CRITICAL: {}".format(elapsed_time))
+        logging.info("Time Elapsed CRITICAL: %s %s", elapsed_time, budget.spent)
     else:
-        logging.info("Time Elapsed: {}".format(elapsed_time))
+        logging.info("Time Elapsed: %s", elapsed_time)
     # TURN END
 # GAME END
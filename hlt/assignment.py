@@ -0,0 +1,174 @@
+import math
+from collections import deque
+from . import entity
+from .constants import WEAPON_DAMAGE
+
+
+def capacity(e):
+    """
+    The number of ships worth sending to a target: the free docking spots of a planet, or the number of full
+    volleys needed to destroy a ship.
+
+    :param entity.Entity e: The target
+    :return: The number of ships the target can take
+    :rtype: int
+    """
+    if type(e) == entity.Planet:
+        return e.rem_spots()
+    return math.ceil(e.hp/WEAPON_DAMAGE)
+
+
+class Auction:
+    """
+    Minimum-cost assignment of ships to targets with capacities, solved with the auction algorithm.
+
+    Every target is split into as many slots as its capacity, and every ship may also stay idle at a fixed
+    cost, so the problem is an asymmetric assignment of ships to slots. Ships bid for their cheapest slot
+    with epsilon-scaling (forward auction), then slots left empty with a positive price lower it until they
+    are filled or free (reverse auction), which makes the result optimal to within epsilon per ship.
+
+    The slot prices are kept between solves and seed the next one, so a turn which looks like the last one
+    only needs a few bids.
+
+    :ivar prices: The slot prices of every target after the last solve
+    :ivar bids: The number of bids made by the last solve
+    """
+
+    def __init__(self, epsilon=.01, scale=5):
+        """
+        :param float epsilon: The final bid increment. The total cost is within epsilon per ship of optimal.
+        :param float scale: The factor epsilon shrinks by between scaling phases
+        """
+        self.epsilon = epsilon
+        self.scale = scale
+        self.prices = {}
+        self.bids = 0
+
+    def solve(self, ships, targets, cost, idle_cost, capacity=capacity, candidates=None):
+        """
+        :param list[entity.Ship] ships: The ships to assign
+        :param list[entity.Entity] targets: The targets to assign them to
+        :param function cost: cost(ship, target), the lower the better. None leaves the pair out.
+        :param float idle_cost: The cost of leaving a ship without a target
+        :param function capacity: capacity(target), the number of ships the target can take
+        :param dict candidates: If given, the only targets considered for each ship, to keep the problem
+            sparse on big maps
+        :return: The target of every ship, None for the ships left idle
+        :rtype: dict
+        """
+        # Split the targets into slots, reusing the last solve's prices for the slots which are left
+        slot_target = []
+        price = []
+        first_slot = {}
+        for t in targets:
+            n = capacity(t)
+            if n <= 0:
+                continue
+            old = self.prices.get(t, ())
+            first_slot[t] = (len(price), n)
+            slot_target.extend([t]*n)
+            price.extend(old[k] if k < len(old) else 0.0 for k in range(n))
+
+        arcs = []
+        lowest = idle_cost
+        for s in ships:
+            row = []
+            for t in (targets if candidates is None else candidates.get(s, ())):
+                if t not in first_slot:
+                    continue
+                c = cost(s, t)
+                # A target no cheaper than idling is never worth taking
+                if c is None or c >= idle_cost:
+                    continue
+                lowest = min(lowest, c)
+                j, n = first_slot[t]
+                row.extend((k, c) for k in range(j, j + n))
+            arcs.append(row)
+
+        self.bids = 0
+        final = self.epsilon
+        eps = max(final, (idle_cost - lowest)/self.scale if not self.prices else final*self.scale)
+        while True:
+            assigned, owner, level = self._forward(arcs, idle_cost, price, eps)
+            if eps <= final:
+                break
+            eps = max(final, eps/self.scale)
+        self._reverse(arcs, price, assigned, owner, level, eps)
+
+        self.prices = {}
+        for j, t in enumerate(slot_target):
+            self.prices.setdefault(t, []).append(price[j])
+        return {s: None if j < 0 else slot_target[j] for s, j in zip(ships, assigned)}
+
+    def _forward(self, arcs, idle_cost, price, eps):
+        # Unassigned ships bid for their cheapest slot until every ship has a slot or is idle (-1). level[i]
+        # is what ship i pays: the cost of its slot plus the slot's price.
+        n = len(arcs)
+        assigned = [None]*n
+        owner = [-1]*len(price)
+        level = [0.0]*n
+        queue = deque(range(n))
+        bids = 0
+        while queue:
+            i = queue.popleft()
+            best = idle_cost
+            second = idle_cost
+            best_j = -1
+            for j, c in arcs[i]:
+                v = c + price[j]
+                if v < best:
+                    second = best
+                    best = v
+                    best_j = j
+                elif v < second:
+                    second = v
+            if best_j < 0:
+                assigned[i] = -1
+                level[i] = best
+                continue
+            bids += 1
+            price[best_j] += second - best + eps
+            level[i] = second + eps
+            prev = owner[best_j]
+            owner[best_j] = i
+            assigned[i] = best_j
+            if prev >= 0:
+                assigned[prev] = None
+                queue.append(prev)
+        self.bids += bids
+        return assigned, owner, level
+
+    def _reverse(self, arcs, price, assigned, owner, level, eps):
+        # Empty slots may only keep a positive price if no ship would rather take them at a lower one
+        bidders = [[] for _ in price]
+        for i, row in enumerate(arcs):
+            for j, c in row:
+                bidders[j].append((i, c))
+        stale = [j for j in range(len(price)) if owner[j] < 0 and price[j] > 0]
+        while stale:
+            j = stale.pop()
+            best = second = -math.inf
+            best_i = -1
+            best_c = 0
+            for i, c in bidders[j]:
+                v = level[i] - c
+                if v > best:
+                    second = best
+                    best = v
+                    best_i = i
+                    best_c = c
+                elif v > second:
+                    second = v
+            if best <= eps:
+                price[j] = 0.0
+                continue
+            self.bids += 1
+            price[j] = max(0.0, second - eps)
+            prev = assigned[best_i]
+            assigned[best_i] = j
+            owner[j] = best_i
+            level[best_i] = best_c + price[j]
+            if prev >= 0:
+                owner[prev] = -1
+                if price[prev] > 0:
+                    stale.append(prev)
@@ -0,0 +1,108 @@
+import time
+from . import instrument
+
+
+class Budget:
+    """
+    The time budget of one turn, handed out to named phases in order.
+
+    :ivar total: Seconds available for the whole turn
+    :ivar start: Clock reading at the start of the turn
+    :ivar spent: Seconds spent in each finished phase, keyed by phase name
+    """
+
+    def __init__(self, total=1.9, clock=time.process_time, start=None):
+        """
+        :param float total: Seconds available for the whole turn
+        :param function clock: The clock to measure with
+        :param float start: Clock reading at the start of the turn, now if None
+        """
+        self.total = total
+        self._clock = clock
+        self.start = clock() if start is None else start
+        self.spent = {}
+        self._name = None
+        self._phase_start = self.start
+        self._deadline = self.start + total
+
+    def phase(self, name, share=1.0, reserve=0.0):
+        """
+        Finish the current phase and start the next one.
+
+        :param str name: The name of the phase
+        :param float share: The fraction of the usable time left that this phase may take
+        :param float reserve: Seconds set aside for the phases after this one
+        :return: nothing
+        """
+        now = self._clock()
+        self._finish(now)
+        self._name = name
+        self._phase_start = now
+        self._deadline = now + max(0, self.start + self.total - now - reserve)*share
+
+    def _finish(self, now):
+        if self._name is not None:
+            self.spent[self._name] = self.spent.get(self._name, 0) + now - self._phase_start
+            instrument.add_time('phase.' + self._name, now - self._phase_start)
+            self._name = None
+
+    def close(self):
+        """
+        Finish the current phase.
+
+        :return: nothing
+        """
+        self._finish(self._clock())
+
+    def elapsed(self):
+        """
+        :return: Seconds since the start of the turn
+        :rtype: float
+        """
+        return self._clock() - self.start
+
+    def remaining(self):
+        """
+        :return: Seconds left in the turn
+        :rtype: float
+        """
+        return self.start + self.total - self._clock()
+
+    def expired(self):
+        """
+        :return: True if the whole turn's budget is used up
+        :rtype: bool
+        """
+        return self.remaining() <= 0
+
+    def phase_remaining(self):
+        """
+        :return: Seconds left in the current phase
+        :rtype: float
+        """
+        return self._deadline - self._clock()
+
+    def phase_expired(self):
+        """
+        :return: True if the current phase's slice is used up
+        :rtype: bool
+        """
+        return self.phase_remaining() <= 0
+
+    def degrade(self, full, minimum):
+        """
+        Scale a work limit (e.g. the max_deviation of nav) to the time left in the current phase: the full
+        limit until half of the phase is used, then linearly down to the minimum.
+
+        :param int full: The limit when there is plenty of time
+        :param int minimum: The limit when the phase is out of time
+        :return: The limit to use now
+        :rtype: int
+        """
+        length = self._deadline - self._phase_start
+        if length <= 0:
+            return minimum
+        left = self.phase_remaining()/length
+        if left >= .5:
+            return full
+        return max(minimum, int(minimum + (full - minimum)*left*2))
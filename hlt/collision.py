@@ -1,40 +1,146 @@
-from .entity import Position, Entity
+import math
+from .entity import Entity
+from .geom import min_dist_xy, ps_dist_xy
+
+# Slack on the bounding box tests, so that rounding can only send a circle that misses to the exact test,
+# never skip one that hits
+_BOX_SLACK = .000001
+
+
+def _point(p):
+    return p.loc if isinstance(p, Entity) else p
 
 
 def intersect_segment_circle(start, end, circle, *, fudge=0.5):
     """
     Test whether a line segment and circle intersect.
 
-    :param Entity start: The start of the line segment. (Needs x, y attributes)
-    :param Entity end: The end of the line segment. (Needs x, y attributes)
-    :param Entity circle: The circle to test against. (Needs x, y, r attributes)
+    :param start: The start of the line segment, a Point or an Entity
+    :param end: The end of the line segment, a Point or an Entity
+    :param Entity circle: The circle to test against
     :param float fudge: A fudge factor; additional distance to leave between the segment and circle. (Probably set this to the ship radius, 0.5.)
     :return: True if intersects, False otherwise
     :rtype: bool
     """
-    # Derived with SymPy
-    # Parameterize the segment as start + t * (end - start),
-    # and substitute into the equation of a circle
-    # Solve for t
-    dx = end.x - start.x
-    dy = end.y - start.y
+    start = _point(start)
+    end = _point(end)
+    return ps_dist_xy(circle.loc.x, circle.loc.y, start.x, start.y, end.x, end.y) <= circle.radius + fudge
+
+
+def closest_approach_xy(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+    """
+    When and how close two points come while moving at constant speed, a from (ax1, ay1) to (ax2, ay2) and b
+    from (bx1, by1) to (bx2, by2), over the same turn.
+
+    :return: The time of closest approach as a fraction of the turn, and the distance then
+    :rtype: (float, float)
+    """
+    start_x = bx1 - ax1
+    start_y = by1 - ay1
+    delta_x = (bx2 - bx1) - (ax2 - ax1)
+    delta_y = (by2 - by1) - (ay2 - ay1)
+    d = delta_x**2 + delta_y**2
+    t = 0 if d == 0 else min(max(-(start_x*delta_x + start_y*delta_y)/d, 0), 1)
+    return t, math.sqrt((start_x + t*delta_x)**2 + (start_y + t*delta_y)**2)
+
+
+def closest_approach(a, b):
+    """
+    :param geom.Seg a: The move of one point over a turn
+    :param geom.Seg b: The move of the other over the same turn
+    :return: The time of closest approach as a fraction of the turn, and the distance then
+    :rtype: (float, float)
+    """
+    return closest_approach_xy(a.p1.x, a.p1.y, a.p2.x, a.p2.y, b.p1.x, b.p1.y, b.p2.x, b.p2.y)
+
+
+def moving_circles_collide(a, ra, b, rb):
+    """
+    :param geom.Seg a: The move of one circle's center over a turn
+    :param float ra: Its radius
+    :param geom.Seg b: The move of the other circle's center over the same turn
+    :param float rb: Its radius
+    :return: True if the circles touch at some time during the turn
+    :rtype: bool
+    """
+    return min_dist_xy(a.p1.x, a.p1.y, a.p2.x, a.p2.y, b.p1.x, b.p1.y, b.p2.x, b.p2.y) <= ra + rb
+
+
+def segment_circles(x1, y1, x2, y2, circles):
+    """
+    Test one segment against many circles. Circles whose bounding box misses the segment's are ruled out
+    without the exact test.
+
+    :param float x1, y1: The start of the segment
+    :param float x2, y2: The end of the segment
+    :param circles: A sequence of (x, y, r) circles
+    :return: The index of the first circle the segment comes within r of, or -1 if none
+    :rtype: int
+    """
+    lo_x, hi_x = (x1 - _BOX_SLACK, x2 + _BOX_SLACK) if x1 < x2 else (x2 - _BOX_SLACK, x1 + _BOX_SLACK)
+    lo_y, hi_y = (y1 - _BOX_SLACK, y2 + _BOX_SLACK) if y1 < y2 else (y2 - _BOX_SLACK, y1 + _BOX_SLACK)
+    for k, (x, y, r) in enumerate(circles):
+        if lo_x - r <= x <= hi_x + r and lo_y - r <= y <= hi_y + r and ps_dist_xy(x, y, x1, y1, x2, y2) <= r:
+            return k
+    return -1
+
+
+def segments_circles(segments, circles):
+    """
+    Test many segments against many circles.
+
+    :param segments: A sequence of (x1, y1, x2, y2) segments
+    :param circles: A sequence of (x, y, r) circles
+    :return: For each segment, the index of the first circle it comes within r of, or -1 if none
+    :rtype: list[int]
+    """
+    circles = list(circles)
+    return [segment_circles(x1, y1, x2, y2, circles) for x1, y1, x2, y2 in segments]
+
 
-    a = dx**2 + dy**2
-    b = -2 * (start.x**2 - start.x*end.x - start.x*circle.x + end.x*circle.x +
-              start.y**2 - start.y*end.y - start.y*circle.y + end.y*circle.y)
-    c = (start.x - circle.x)**2 + (start.y - circle.y)**2
+def path_circles(x1, y1, x2, y2, paths):
+    """
+    Test one moving point against many moving circles over the same turn.
 
-    if a == 0.0:
-        # Start and end are the same point
-        return start.calculate_distance_between(circle) <= circle.radius + fudge
+    :param float x1, y1: Where the point starts
+    :param float x2, y2: Where it ends
+    :param paths: An iterable of (x1, y1, x2, y2, r) circles, moving from (x1, y1) to (x2, y2)
+    :return: The index of the first circle the point comes within r of, or -1 if none
+    :rtype: int
+    """
+    move_x = x2 - x1
+    move_y = y2 - y1
+    for k, (bx1, by1, bx2, by2, r) in enumerate(paths):
+        # The circle's path relative to the point must pass within r of the origin, so its box must too
+        start_x = bx1 - x1
+        start_y = by1 - y1
+        end_x = bx2 - x1 - move_x
+        end_y = by2 - y1 - move_y
+        reach = r + _BOX_SLACK
+        if ((start_x > reach and end_x > reach) or (start_x < -reach and end_x < -reach) or
+                (start_y > reach and end_y > reach) or (start_y < -reach and end_y < -reach)):
+            continue
+        if min_dist_xy(x1, y1, x2, y2, bx1, by1, bx2, by2) <= r:
+            return k
+    return -1
 
-    # Time along segment when closest to the circle (vertex of the quadratic)
-    t = min(-b / (2 * a), 1.0)
-    if t < 0:
-        return False
 
-    closest_x = start.x + dx * t
-    closest_y = start.y + dy * t
-    closest_distance = Position(closest_x, closest_y).calculate_distance_between(circle)
+def pursuit_circles(x1, y1, x2, y2, circles, speed):
+    """
+    Test one moving point against many circles that each head straight for where the point ends up, at up to
+    speed, over the same turn.
 
-    return closest_distance <= circle.radius + fudge
+    :param float x1, y1: Where the point starts
+    :param float x2, y2: Where it ends
+    :param circles: A sequence of (x, y, r) circles
+    :param float speed: How far a circle can move in the turn
+    :return: The index of the first circle the point comes within r of, or -1 if none
+    :rtype: int
+    """
+    for k, (x, y, r) in enumerate(circles):
+        dist = math.sqrt((x2 - x)**2 + (y2 - y)**2)
+        step = dist if dist < speed else speed
+        angle = math.radians(math.degrees(math.atan2(y2 - y, x2 - x)) % 360)
+        if min_dist_xy(x1, y1, x2, y2, x, y, x + step*math.cos(angle), y + step*math.sin(angle)) <= r:
+            return k
+    return -1
@@ -0,0 +1,68 @@
+import math
+from bisect import bisect_left, bisect_right
+from . import entity
+from .constants import WEAPON_DAMAGE, WEAPON_RADIUS
+
+
+class Volley:
+    """
+    The outcome of every undocked ship firing at once, the way the engine resolves weapons: each ship splits
+    its damage evenly across the enemy ships within reach of it, and all the damage lands at the same time.
+
+    :ivar snapshot: The frame the volley was resolved on
+    :ivar hp: The predicted health of each ship row after the volley
+    :ivar fired: The rows of the ships which had an enemy in reach
+    :ivar dead: The rows of the ships the volley destroys
+    """
+
+    def __init__(self, snapshot, reach=WEAPON_RADIUS, damage=WEAPON_DAMAGE, cooldown=None):
+        """
+        :param snapshot.Snapshot snapshot: The frame to resolve
+        :param float reach: Ships fire at enemy ships whose center is closer than this
+        :param float damage: The damage each firing ship deals, split across its targets
+        :param cooldown: If given, the weapon cooldown of each ship row; ships still cooling down hold fire
+        """
+        self.snapshot = snapshot
+        n = snapshot.num_ships
+        xs, ys, owners, status = snapshot.x, snapshot.y, snapshot.owner, snapshot.status
+        undocked = entity.Ship.DockingStatus.UNDOCKED.value
+
+        # Sweep the ships in x order so each one only looks at the slice that can be within reach
+        order = sorted(range(n), key=xs.__getitem__)
+        sorted_x = [xs[i] for i in order]
+        self.hp = snapshot.hp[:n]
+        self.fired = []
+        for a in range(n):
+            if status[a] != undocked or (cooldown is not None and cooldown[a] > 0):
+                continue
+            x, y, owner = xs[a], ys[a], owners[a]
+            targets = [t for t in order[bisect_left(sorted_x, x - reach):bisect_right(sorted_x, x + reach)]
+                       if owners[t] != owner and math.sqrt((xs[t] - x)**2 + (ys[t] - y)**2) < reach]
+            if targets:
+                self.fired.append(a)
+                share = damage/len(targets)
+                for t in targets:
+                    self.hp[t] -= share
+        self.dead = [i for i in range(n) if self.hp[i] <= 0]
+
+    def fired_ships(self):
+        """
+        :return: The ships which fire this turn
+        :rtype: list[entity.Ship]
+        """
+        return [self.snapshot.entities[i] for i in self.fired]
+
+    def dead_ships(self):
+        """
+        :return: The ships destroyed by the volley
+        :rtype: list[entity.Ship]
+        """
+        return [self.snapshot.entities[i] for i in self.dead]
+
+    def damaged_ships(self):
+        """
+        :return: (ship, predicted health) of every ship which takes damage
+        :rtype: list[(entity.Ship, float)]
+        """
+        snap = self.snapshot
+        return [(snap.entities[i], self.hp[i]) for i in range(snap.num_ships) if self.hp[i] != snap.hp[i]]
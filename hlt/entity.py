@@ -45,6 +45,18 @@ class Entity:
     def _link(self, players, planets):
         pass
 
+    def _copy(self):
+        """
+        A shallow copy of the entity. Its owner, planet and docked ships still point at the original's until
+        they are relinked; its location is shared, since points are never changed in place.
+
+        :return: The copy
+        :rtype: Entity
+        """
+        e = object.__new__(type(self))
+        e.__dict__.update(self.__dict__)
+        return e
+
     def __str__(self):
 
         return "{} {} at pos: {}"\
@@ -128,51 +140,83 @@ class Planet(Entity):
     def rem_spots(self):
         return self.num_docking_spots - self.num_ships()
 
+    def _update(self, tokens, i):
+        """
+        Update this planet in place from the tokens describing it in a new frame. The owner and docked ships
+        are left as ids until the next _link.
+
+        :param list[str] tokens: The tokenized input
+        :param int i: The index of the planet's first token
+        :return: The index of the first unused token.
+        :rtype: int
+        """
+        (x, y, hp, r, docking, current, remaining,
+         owned, owner, num_docked_ships) = tokens[i + 1:i + 11]
+
+        x = float(x)
+        y = float(y)
+        if x != self.loc.x or y != self.loc.y:
+            self.loc = Point(x, y)
+        start = i + 11
+        end = start + int(num_docked_ships)
+
+        self.hp = int(hp)
+        self.radius = float(r)
+        self.num_docking_spots = int(docking)
+        self.current_production = int(current)
+        self.remaining_resources = int(remaining)
+        self.owner = int(owner) if bool(int(owned)) else None
+        self._docked_ship_ids = [int(ship_id) for ship_id in tokens[start:end]]
+        self._docked_ships = {}
+
+        return end
+
     @staticmethod
-    def _parse_single(tokens):
+    def _parse_single(tokens, i):
         """
         Parse a single planet given tokenized input from the game environment.
 
-        :return: The planet ID, planet object, and unused tokens.
-        :rtype: (int, Planet, list[str])
+        :param list[str] tokens: The tokenized input
+        :param int i: The index of the planet's first token
+        :return: The planet ID, planet object, and index of the first unused token.
+        :rtype: (int, Planet, int)
         """
         (plid, x, y, hp, r, docking, current, remaining,
-         owned, owner, num_docked_ships, *remainder) = tokens
+         owned, owner, num_docked_ships) = tokens[i:i + 11]
 
         plid = int(plid)
-        docked_ships = []
-
-        for _ in range(int(num_docked_ships)):
-            ship_id, *remainder = remainder
-            docked_ships.append(int(ship_id))
+        start = i + 11
+        end = start + int(num_docked_ships)
+        docked_ships = [int(ship_id) for ship_id in tokens[start:end]]
 
-        planet = Planet(int(plid),
+        planet = Planet(plid,
                         Point(float(x), float(y)),
                         int(hp), float(r), int(docking),
                         int(current), int(remaining),
                         bool(int(owned)), int(owner),
                         docked_ships)
 
-        return plid, planet, remainder
+        return plid, planet, end
 
     @staticmethod
-    def _parse(tokens):
+    def _parse(tokens, i=0):
         """
         Parse planet data given a tokenized input.
 
         :param list[str] tokens: The tokenized input
-        :return: the populated planet dict and the unused tokens.
-        :rtype: (dict, list[str])
+        :param int i: The index of the first token to parse
+        :return: the populated planet dict and the index of the first unused token.
+        :rtype: (dict, int)
         """
-        num_planets, *remainder = tokens
-        num_planets = int(num_planets)
+        num_planets = int(tokens[i])
+        i += 1
         planets = {}
 
         for _ in range(num_planets):
-            plid, planet, remainder = Planet._parse_single(remainder)
+            plid, planet, i = Planet._parse_single(tokens, i)
             planets[plid] = planet
 
-        return planets, remainder
+        return planets, i
 
 
 class Ship(Entity):
@@ -265,18 +309,44 @@ class Ship(Entity):
         self.owner = players.get(self.owner)  # All ships should have an owner. If not, this will just reset to None
         self.planet = planets.get(self.planet)  # If not will just reset to none
 
+    def _update(self, player_id, tokens, i):
+        """
+        Update this ship in place from the tokens describing it in a new frame. The owner and planet are left
+        as ids until the next _link.
+
+        :param int player_id: The id of the player who controls the ship
+        :param list[str] tokens: The tokenized input
+        :param int i: The index of the ship's first token
+        :return: The index of the first unused token.
+        :rtype: int
+        """
+        (x, y, hp, vel_x, vel_y,
+         docked, docked_planet, progress, cooldown) = tokens[i + 1:i + 10]
+
+        # Points are hashable values, so a moved ship gets a new one rather than mutating the old
+        self.loc = Point(float(x), float(y))
+        self.owner = player_id
+        self.hp = int(hp)
+        self.docking_status = Ship.DockingStatus(int(docked))
+        self.planet = int(docked_planet) if (self.docking_status is not Ship.DockingStatus.UNDOCKED) else None
+        self._docking_progress = int(progress)
+        self._weapon_cooldown = int(cooldown)
+
+        return i + 10
+
     @staticmethod
-    def _parse_single(player_id, tokens):
+    def _parse_single(player_id, tokens, i):
         """
         Parse a single ship given tokenized input from the game environment.
 
         :param int player_id: The id of the player who controls the ships
-        :param list[tokens]: The remaining tokens
-        :return: The ship ID, ship object, and unused tokens.
-        :rtype: int, Ship, list[str]
+        :param list[str] tokens: The tokenized input
+        :param int i: The index of the ship's first token
+        :return: The ship ID, ship object, and index of the first unused token.
+        :rtype: int, Ship, int
         """
         (sid, x, y, hp, vel_x, vel_y,
-         docked, docked_planet, progress, cooldown, *remainder) = tokens
+         docked, docked_planet, progress, cooldown) = tokens[i:i + 10]
 
         sid = int(sid)
         docked = Ship.DockingStatus(int(docked))
@@ -289,23 +359,25 @@ class Ship(Entity):
                     docked, int(docked_planet),
                     int(progress), int(cooldown))
 
-        return sid, ship, remainder
+        return sid, ship, i + 10
 
     @staticmethod
-    def _parse(player_id, tokens):
+    def _parse(player_id, tokens, i=0):
         """
         Parse ship data given a tokenized input.
 
         :param int player_id: The id of the player who owns the ships
         :param list[str] tokens: The tokenized input
-        :return: The dict of Players and unused tokens.
-        :rtype: (dict, list[str])
+        :param int i: The index of the first token to parse
+        :return: The dict of Ships and the index of the first unused token.
+        :rtype: (dict, int)
         """
         ships = {}
-        num_ships, *remainder = tokens
-        for _ in range(int(num_ships)):
-            ship_id, ships[ship_id], remainder = Ship._parse_single(player_id, remainder)
-        return ships, remainder
+        num_ships = int(tokens[i])
+        i += 1
+        for _ in range(num_ships):
+            ship_id, ships[ship_id], i = Ship._parse_single(player_id, tokens, i)
+        return ships, i
 
 
 class Position(Entity):
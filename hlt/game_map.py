@@ -1,4 +1,24 @@
-from . import entity
+import functools
+from . import entity, instrument
+from .snapshot import Snapshot
+from .spatial import SpatialIndex
+
+
+def _per_frame(method):
+    """
+    Compute a Map accessor at most once per frame. The result is kept until the next parse or remove_ship, so
+    accessors returning entity collections return tuples which callers cannot modify.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def cached(self):
+        try:
+            return self._cache[name]
+        except KeyError:
+            result = self._cache[name] = method(self)
+            return result
+    return cached
 
 
 class Map:
@@ -8,6 +28,12 @@ class Map:
     :ivar my_id: Current player id associated with the map
     :ivar width: Map width
     :ivar height: Map height
+
+    The entity accessors (all_ships, en_uships, my_planets, ...) are computed once per frame and return tuples.
+
+    :ivar spawned_ship_ids: Ids of the ships which appeared in the last parsed frame
+    :ivar destroyed_ship_ids: Ids of the ships which disappeared in the last parsed frame
+    :ivar destroyed_planet_ids: Ids of the planets which disappeared in the last parsed frame
     """
 
     def __init__(self, my_id, width, height):
@@ -21,7 +47,13 @@ class Map:
         self.height = height
         self._players = {}
         self._planets = {}
+        self._ships = {}
+        self.spawned_ship_ids = set()
+        self.destroyed_ship_ids = set()
+        self.destroyed_planet_ids = set()
+        self._cache = {}
 
+    @_per_frame
     def get_me(self):
         """
         :return: The user's player
@@ -37,12 +69,13 @@ class Map:
         """
         return self._players.get(player_id)
 
+    @_per_frame
     def all_players(self):
         """
-        :return: List of all players
-        :rtype: list[Player]
+        :return: All players
+        :rtype: tuple[Player]
         """
-        return list(self._players.values())
+        return tuple(self._players.values())
 
     def get_planet(self, planet_id):
         """
@@ -52,12 +85,13 @@ class Map:
         """
         return self._planets.get(planet_id)
 
+    @_per_frame
     def all_planets(self):
         """
-        :return: List of all planets
-        :rtype: list[entity.Planet]
+        :return: All planets
+        :rtype: tuple[entity.Planet]
         """
-        return list(self._planets.values())
+        return tuple(self._planets.values())
 
     def _link(self):
         """
@@ -72,74 +106,228 @@ class Map:
         """
         Parse the map description from the game.
 
-        :param map_string: The string which the Halite engine outputs
+        :param bytes map_string: The line the Halite engine outputs, as bytes or str
         :return: nothing
         """
         tokens = map_string.split()
 
-        self._players, tokens = Player._parse(tokens)
-        self._planets, tokens = entity.Planet._parse(tokens)
+        players, i = Player._parse(tokens)
+        planets, i = entity.Planet._parse(tokens, i)
+
+        assert(i == len(tokens))  # There should be no remaining tokens at this point
+        ships = {}
+        for player in players.values():
+            ships.update(player._ships)
+        self._set_frame(players, planets, ships)
+
+    def _update(self, map_string):
+        """
+        Parse the map description from the game, updating the players, ships and planets of the previous frame
+        in place instead of rebuilding them. Entities keep their identity for as long as they exist.
 
-        assert(len(tokens) == 0)  # There should be no remaining tokens at this point
-        self._link()
+        :param bytes map_string: The line the Halite engine outputs, as bytes or str
+        :return: nothing
+        """
+        tokens = map_string.split()
+        players = {}
+        ships = {}
+        planets = {}
 
+        num_players = int(tokens[0])
+        i = 1
+        for _ in range(num_players):
+            player_id = int(tokens[i])
+            num_ships = int(tokens[i + 1])
+            i += 2
+            player_ships = {}
+            for _ in range(num_ships):
+                ship = self._ships.get(int(tokens[i]))
+                if ship is None:
+                    ship_id, ship, i = entity.Ship._parse_single(player_id, tokens, i)
+                else:
+                    i = ship._update(player_id, tokens, i)
+                player_ships[ship.id] = ship
+
+            player = self._players.get(player_id)
+            if player is None:
+                player = Player(player_id, player_ships)
+            else:
+                player._ships = player_ships
+            players[player_id] = player
+            ships.update(player_ships)
+
+        num_planets = int(tokens[i])
+        i += 1
+        for _ in range(num_planets):
+            planet = self._planets.get(int(tokens[i]))
+            if planet is None:
+                plid, planet, i = entity.Planet._parse_single(tokens, i)
+            else:
+                i = planet._update(tokens, i)
+            planets[planet.id] = planet
+
+        assert(i == len(tokens))  # There should be no remaining tokens at this point
+        self._set_frame(players, planets, ships)
+
+    def _set_frame(self, players, planets, ships):
+        """
+        Install a newly parsed frame, record which entities appeared or disappeared since the previous one and
+        link everything together.
+
+        :param dict[int, Player] players: The players keyed by id
+        :param dict[int, entity.Planet] planets: The planets keyed by id
+        :param dict[int, entity.Ship] ships: All ships keyed by id
+        :return: nothing
+        """
+        self.spawned_ship_ids = ships.keys() - self._ships.keys()
+        self.destroyed_ship_ids = self._ships.keys() - ships.keys()
+        self.destroyed_planet_ids = self._planets.keys() - planets.keys()
+        self._players = players
+        self._planets = planets
+        self._ships = ships
+        self._cache = {}
+        with instrument.timer('link'):
+            self._link()
+
+    @_per_frame
     def all_ships(self):
         """
         Helper function to extract all ships from all players
 
-        :return: List of ships
-        :rtype: List[Ship]
+        :return: All ships
+        :rtype: tuple[Ship]
         """
-        all_ships = []
-        for player in self.all_players():
-            all_ships.extend(player.all_ships())
-        return all_ships
+        return tuple(s for player in self.all_players() for s in player.all_ships())
 
+    @_per_frame
     def all_uships(self):
-        return [s for s in self.all_ships() if s.can_atk()]
+        return tuple(s for s in self.all_ships() if s.can_atk())
 
+    @_per_frame
     def all_dships(self):
-        return [s for s in self.all_ships() if not s.can_atk()]
+        return tuple(s for s in self.all_ships() if not s.can_atk())
 
+    @_per_frame
     def my_ships(self):
-        return self.get_me().all_ships()
+        return tuple(self.get_me().all_ships())
 
+    @_per_frame
     def my_uships(self):
-        return [s for s in self.my_ships() if s.can_atk()]
+        return tuple(s for s in self.my_ships() if s.can_atk())
 
+    @_per_frame
     def my_dships(self):
-        return [s for s in self.my_ships() if not s.can_atk()]
+        return tuple(s for s in self.my_ships() if not s.can_atk())
 
+    @_per_frame
     def en_ships(self):
-        ships = []
-        for player in self.all_players():
-            if player != self.get_me():
-                ships = ships + player.all_ships()
-        return ships
+        me = self.get_me()
+        return tuple(s for player in self.all_players() if player != me for s in player.all_ships())
 
+    @_per_frame
     def en_uships(self):
-        return [s for s in self.en_ships() if s.can_atk()]
+        return tuple(s for s in self.en_ships() if s.can_atk())
 
+    @_per_frame
     def en_dships(self):
-        return [s for s in self.en_ships() if not s.can_atk()]
+        return tuple(s for s in self.en_ships() if not s.can_atk())
 
+    @_per_frame
     def my_planets(self):
-        return [p for p in self.all_planets() if p.owner == self.get_me()]
+        me = self.get_me()
+        return tuple(p for p in self.all_planets() if p.owner == me)
 
+    @_per_frame
     def my_uplanets(self):
-        return [p for p in self.my_planets() if not p.is_full()]
+        return tuple(p for p in self.my_planets() if not p.is_full())
 
+    @_per_frame
     def unowned_planets(self):
-        return [p for p in self.all_planets() if not p.is_owned()]
+        return tuple(p for p in self.all_planets() if not p.is_owned())
 
+    @_per_frame
     def en_planets(self):
-        return [p for p in self.all_planets() if p.owner != self.get_me() and p.is_owned()]
+        me = self.get_me()
+        return tuple(p for p in self.all_planets() if p.owner != me and p.is_owned())
 
+    @_per_frame
     def all_entities(self):
         return self.all_ships() + self.all_planets()
 
     def remove_ship(self, ship):
         ship.owner.remove_ship(ship)
+        self._cache = {}
+
+    def fork(self):
+        """
+        A copy of the current frame which can be changed (ships damaged or removed, ...) without affecting this
+        map, far cheaper than copy.deepcopy. Players and entities are copied shallowly and relinked to each
+        other.
+
+        :return: The copy
+        :rtype: Map
+        """
+        gmap = Map(self.my_id, self.width, self.height)
+        ships = {sid: s._copy() for sid, s in self._ships.items()}
+        planets = {pid: p._copy() for pid, p in self._planets.items()}
+        players = {pid: Player(pid, {sid: ships[sid] for sid in player._ships})
+                   for pid, player in self._players.items()}
+        for s in ships.values():
+            s.owner = players.get(s.owner.id)
+            if s.planet is not None:
+                s.planet = planets.get(s.planet.id)
+        for p in planets.values():
+            if p.owner is not None:
+                p.owner = players.get(p.owner.id)
+                p._docked_ships = {sid: None if s is None else ships[s.id] for sid, s in p._docked_ships.items()}
+        gmap._players = players
+        gmap._planets = planets
+        gmap._ships = ships
+        gmap.spawned_ship_ids = set(self.spawned_ship_ids)
+        gmap.destroyed_ship_ids = set(self.destroyed_ship_ids)
+        gmap.destroyed_planet_ids = set(self.destroyed_planet_ids)
+        return gmap
+
+    @_per_frame
+    def snapshot(self):
+        """
+        The columnar view of the current frame.
+
+        :return: The snapshot of the current frame
+        :rtype: Snapshot
+        """
+        return Snapshot.from_map(self)
+
+    @_per_frame
+    def spatial(self):
+        """
+        The spatial index of the current frame.
+
+        :return: The spatial index of the current frame
+        :rtype: SpatialIndex
+        """
+        return SpatialIndex(self.snapshot())
+
+    def within(self, point, r, filter=None, surface=False):
+        """
+        :param geom.Point point: The center of the query
+        :param float r: The maximum distance from the point
+        :param function filter: If given, only entities accepted by it are returned (see hlt.spatial)
+        :param bool surface: Measure to the surface of the entities instead of their centers
+        :return: The entities within distance r of the point
+        :rtype: list[entity.Entity]
+        """
+        return self.spatial().within(point, r, filter, surface)
+
+    def nearest(self, point, k=1, filter=None):
+        """
+        :param geom.Point point: The center of the query
+        :param int k: The number of entities to return
+        :param function filter: If given, only entities accepted by it are returned (see hlt.spatial)
+        :return: The k entities closest to the point, closest first
+        :rtype: list[entity.Entity]
+        """
+        return self.spatial().nearest(point, k, filter)
 
     def is_en(self, e):
         return e.owner != self.get_me()
@@ -176,41 +364,42 @@ class Player:
         return self._ships.get(ship_id)
 
     def remove_ship(self, ship):
-        if ship in self._ships:
-            del self._ships[ship]
+        if self._ships.get(ship.id) is ship:
+            del self._ships[ship.id]
 
     @staticmethod
-    def _parse_single(tokens):
+    def _parse_single(tokens, i):
         """
         Parse one user given an input string from the Halite engine.
 
         :param list[str] tokens: The input string as a list of str from the Halite engine.
-        :return: The parsed player id, player object, and remaining tokens
-        :rtype: (int, Player, list[str])
+        :param int i: The index of the player's first token
+        :return: The parsed player id, player object, and index of the first unused token
+        :rtype: (int, Player, int)
         """
-        player_id, *remainder = tokens
-        player_id = int(player_id)
-        ships, remainder = entity.Ship._parse(player_id, remainder)
+        player_id = int(tokens[i])
+        ships, i = entity.Ship._parse(player_id, tokens, i + 1)
         player = Player(player_id, ships)
-        return player_id, player, remainder
+        return player_id, player, i
 
     @staticmethod
-    def _parse(tokens):
+    def _parse(tokens, i=0):
         """
         Parse an entire user input string from the Halite engine for all users.
 
         :param list[str] tokens: The input string as a list of str from the Halite engine.
-        :return: The parsed players in the form of player dict, and remaining tokens
-        :rtype: (dict, list[str])
+        :param int i: The index of the first token to parse
+        :return: The parsed players in the form of player dict, and index of the first unused token
+        :rtype: (dict, int)
         """
-        num_players, *remainder = tokens
-        num_players = int(num_players)
+        num_players = int(tokens[i])
+        i += 1
         players = {}
 
         for _ in range(num_players):
-            player, players[player], remainder = Player._parse_single(remainder)
+            player, players[player], i = Player._parse_single(tokens, i)
 
-        return players, remainder
+        return players, i
 
     def __str__(self):
         return "Player {} with ships {}".format(self.id, self.all_ships())
@@ -2,15 +2,31 @@ import math
 from . import constants
 import logging
 
+#Unit vector components for every integer heading in degrees. The engine only takes integer angles.
+COS = tuple(math.cos(math.radians(a)) for a in range(360))
+SIN = tuple(math.sin(math.radians(a)) for a in range(360))
+
+#POLAR[speed][angle] is the (x, y) offset of a thrust for every integer speed up to MAX_SPEED
+POLAR = tuple(tuple((r*COS[a], r*SIN[a]) for a in range(360)) for r in range(constants.MAX_SPEED + 1))
+
+#Offset (x, y) of a move of length r at angle ang degrees, read from the tables for integer headings
+def polar_xy(r, ang):
+	if type(ang) is int and 0 <= ang < 360:
+		if type(r) is int and 0 <= r <= constants.MAX_SPEED:
+			return POLAR[r][ang]
+		return r*COS[ang], r*SIN[ang]
+	return r*math.cos(math.radians(ang)), r*math.sin(math.radians(ang))
+
 class Point:
+	__slots__ = ('x', 'y')
+
 	def __init__(self, x, y):
 		self.x = x
 		self.y = y
 
 	@classmethod
 	def polar(cls, r, ang):
-		x = r*math.cos(math.radians(ang))
-		y = r*math.sin(math.radians(ang))
+		x, y = polar_xy(r, ang)
 		return cls(x,y)
 
 	def __add__(self,p2):
@@ -26,7 +42,7 @@ class Point:
 		return self.__str__()
 
 	def __eq__(self, other):
-		if other == None:
+		if other is None:
 			return False
 		return self.x == other.x and self.y == other.y
 
@@ -46,6 +62,8 @@ class Point:
 		return math.degrees(math.atan2(self.y, self.x)) % 360
 
 class Seg:
+	__slots__ = ('p1', 'p2')
+
 	def __init__(self,p1,p2):
 		self.p1 = p1
 		self.p2 = p2
@@ -80,36 +98,47 @@ def dot(p1,p2):
 
 #Point Segment Distance
 def ps_dist(p, seg):
-	v1 = p - seg.p1
-	v2 = seg.d_vect()
-	d = v2.norm2()
-	
+	return ps_dist_xy(p.x, p.y, seg.p1.x, seg.p1.y, seg.p2.x, seg.p2.y)
+
+#Point Segment Distance on raw coordinates: point (px,py), segment (x1,y1) to (x2,y2)
+def ps_dist_xy(px, py, x1, y1, x2, y2):
+	v1x = px - x1
+	v1y = py - y1
+	v2x = x2 - x1
+	v2y = y2 - y1
+	d = v2x**2 + v2y**2
+
 	if d==0:
-		return pp_dist(p,seg.p1)
+		return math.sqrt((x1 - px)**2 + (y1 - py)**2)
 	else:
-		t = dot(v1,v2)/d
+		t = (v1x*v2x + v1y*v2y)/d
 		if t<0:
 			t = 0
 		elif t>1:
 			t = 1
-		return pp_dist(p, seg.along_line(t))
+		return math.sqrt(((1-t)*x1+t*x2 - px)**2 + ((1-t)*y1+t*y2 - py)**2)
 
 #Min Distance Between two objects traveling on paths seg1 and seg2
 def min_dist(seg1,seg2):
-	start = seg2.p1 - seg1.p1
-	delta = seg2.d_vect() - seg1.d_vect()
-	seg_eff = Seg(start, start + delta)
-	return ps_dist(Point(0,0), seg_eff)
+	return min_dist_xy(seg1.p1.x, seg1.p1.y, seg1.p2.x, seg1.p2.y, seg2.p1.x, seg2.p1.y, seg2.p2.x, seg2.p2.y)
+
+#Min Distance on raw coordinates: paths (ax1,ay1) to (ax2,ay2) and (bx1,by1) to (bx2,by2)
+def min_dist_xy(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+	start_x = bx1 - ax1
+	start_y = by1 - ay1
+	delta_x = (bx2 - bx1) - (ax2 - ax1)
+	delta_y = (by2 - by1) - (ay2 - ay1)
+	return ps_dist_xy(0, 0, start_x, start_y, start_x + delta_x, start_y + delta_y)
 
 def cent_of_mass(pts):
 	p = None
 	for q in pts:
-		if p == None:
+		if p is None:
 			p = q
 		else:
 			p += q
 
-	if p == None:
+	if p is None:
 		return None
 	else:
 		return Point(p.x/len(pts), p.y/len(pts))
@@ -1,108 +1,237 @@
-from . import entity, game_map, geom
+from . import collision, entity, game_map, geom, instrument, spatial
 from hlt.entity import Position, Ship
-from .geom import Point, Seg, min_dist, ps_dist, pp_dist
+from .geom import Point, Seg, COS, SIN
 from .constants import *
 import math
+import bisect
 import logging
 from collections import OrderedDict
 
 def to_turns(dist, speed = MAX_SPEED):
     return dist/speed
 
-def nav(ship, targ, gmap, obs, move_table={}, speed=MAX_SPEED, max_deviation=90):
+#Planets and our docked ships that the ship could reach, and our undocked ships within two moves of it.
+#Each candidate's distance is computed once, from raw coordinates.
+def _obstacles(ship, gmap, reach):
+    me = gmap.get_me()
+    sx = ship.loc.x
+    sy = ship.loc.y
+    near = gmap.within(ship.loc, max(reach,MAX_SPEED*2)+ship.radius+.000001, surface=True)
+    obs = []
+    moving = []
+    for e in near:
+        if type(e) == Ship and e.owner == me and e.can_atk():
+            if e != ship and math.sqrt((e.loc.x - sx)**2 + (e.loc.y - sy)**2)-ship.radius-e.radius<=MAX_SPEED*2:
+                moving.append(e)
+        elif type(e) == entity.Planet or e.owner == me:
+            if math.sqrt((e.loc.x - sx)**2 + (e.loc.y - sy)**2)-ship.radius-e.radius <= reach:
+                obs.append(e)
+    obs.extend(moving)
+    return obs
+
+#Kinds of obstacle row: a committed move, a ship that may still move, a static obstacle, and an enemy
+#that will chase the ship
+_MOVING, _SHORT, _FULL, _ENEMY = 0, 1, 2, 3
+
+#Slack on the broad phase, so that rounding can only keep a row that cannot collide, never drop one that can
+_BROAD_SLACK = .000001
+
+#Flatten the obstacles once per nav call into (kind, x, y, collide dist, end x, end y) rows, nearest first.
+#Given speed and full (the reach of a move and of the whole path), this is also the broad phase: rows which
+#cannot come within their collide dist of any heading's move, by the triangle inequality on the distance
+#computed here once per obstacle, are dropped so the per-heading checks in _sweep only see the survivors.
+def _obstacle_rows(ship, obs, move_table, targ=None, enemies=(), speed=None, full=None):
+    sx = ship.loc.x
+    sy = ship.loc.y
+    broad = speed is not None
+    rows = []
+    for d, _, e in sorted((math.sqrt((e.loc.x - sx)**2 + (e.loc.y - sy)**2), k, e) for k, e in enumerate(obs)):
+        collide_dist = ship.radius+e.radius+.000001
+        if e in enemies:
+            if d > collide_dist+WEAPON_RADIUS:
+                if broad and d - speed - MAX_SPEED > collide_dist+WEAPON_RADIUS+_BROAD_SLACK:
+                    continue
+                rows.append((_ENEMY, e.loc.x, e.loc.y, collide_dist+WEAPON_RADIUS, 0, 0))
+        elif e == targ or e not in move_table and type(e) == Ship and e.can_atk():
+            if broad and d - speed > collide_dist+_BROAD_SLACK:
+                continue
+            rows.append((_SHORT, e.loc.x, e.loc.y, collide_dist, 0, 0))
+        elif e in move_table:
+            m = move_table[e]
+            if broad:
+                d1 = math.sqrt((m.p1.x - sx)**2 + (m.p1.y - sy)**2)
+                length = math.sqrt((m.p2.x - m.p1.x)**2 + (m.p2.y - m.p1.y)**2)
+                if d1 - speed - length > collide_dist+_BROAD_SLACK:
+                    continue
+            rows.append((_MOVING, m.p1.x, m.p1.y, collide_dist, m.p2.x, m.p2.y))
+        else:
+            if broad and d - full > collide_dist+_BROAD_SLACK:
+                continue
+            rows.append((_FULL, e.loc.x, e.loc.y, collide_dist, 0, 0))
+    instrument.count('nav.obstacles', len(obs))
+    instrument.count('nav.rows', len(rows))
+    return rows
+
+#Deviations from the target heading in the order nav tries them: 0, 1, -1, 2, -2, ...
+def _deviations(max_deviation):
+    return [int(n/2) if n%2==0 else -int(n/2) for n in range(1,max_deviation*2+2)]
+
+#Arc of headings (center, half width in degrees) along which a straight move of length reach from (sx, sy)
+#passes within collide_dist of (ex, ey), or None if no heading does
+def _blocked_arc(sx, sy, ex, ey, collide_dist, reach):
+    dx = ex - sx
+    dy = ey - sy
+    d = math.sqrt(dx**2 + dy**2)
+    if d <= collide_dist:
+        return 0, 180
+    if reach <= 0:
+        return None
+
+    if reach**2 >= d**2 - collide_dist**2:
+        #The tangent point is in reach, so every heading whose ray hits the circle is blocked
+        half = math.degrees(math.asin(collide_dist/d))
+    else:
+        #Otherwise only headings whose end point lands inside the circle are
+        cos_half = (reach**2 + d**2 - collide_dist**2)/(2*reach*d)
+        if cos_half >= 1:
+            return None
+        half = math.degrees(math.acos(cos_half))
+    return math.degrees(math.atan2(dy, dx)), half
+
+#Deviations in _deviations order, skipping those that the static rows block. The arcs are merged once and
+#then stepped over whole, so this costs O(rows log rows) plus O(log rows) per deviation produced. Arcs are
+#shrunk by a hair so that rounding can only let a blocked heading through to the exact checks in _sweep,
+#never drop a free one.
+def _free_deviations(ship, rows, angle, max_deviation, speed, full):
+    sx = ship.loc.x
+    sy = ship.loc.y
+    arcs = []
+    for kind, ex, ey, collide_dist, _, _ in rows:
+        if kind == _SHORT or kind == _FULL:
+            arc = _blocked_arc(sx, sy, ex, ey, collide_dist, speed if kind == _SHORT else full)
+            if arc is not None:
+                center = (arc[0] - angle + 180)%360 - 180
+                half = arc[1] - .0000001
+                for shift in (-360, 0, 360):
+                    arcs.append((center + shift - half, center + shift + half))
+
+    arcs.sort()
+    merged = []
+    for lo, hi in arcs:
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    los = [lo for lo, _ in merged]
+
+    def side(d, step):
+        while -max_deviation <= d <= max_deviation:
+            i = bisect.bisect_right(los, d) - 1
+            if i >= 0 and d <= merged[i][1]:
+                d = math.floor(merged[i][1]) + 1 if step > 0 else math.ceil(merged[i][0]) - 1
+            else:
+                yield d
+                d += step
+
+    up = side(0, 1)
+    down = side(-1, -1)
+    a = next(up, None)
+    b = next(down, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a <= -b):
+            yield a
+            a = next(up, None)
+        else:
+            yield b
+            b = next(down, None)
+
+#Test the headings in devs order against every obstacle row, each kind of row in one batched collision
+#query, and return the first collision-free (angle, end x, end y), or None
+def _sweep(ship, gmap, rows, angle, devs, speed, full):
+    sx = ship.loc.x
+    sy = ship.loc.y
+    width = gmap.width
+    height = gmap.height
+    short = [(ex, ey, collide_dist) for kind, ex, ey, collide_dist, _, _ in rows if kind == _SHORT]
+    whole = [(ex, ey, collide_dist) for kind, ex, ey, collide_dist, _, _ in rows if kind == _FULL]
+    moving = [(ex, ey, ex2, ey2, collide_dist) for kind, ex, ey, collide_dist, ex2, ey2 in rows if kind == _MOVING]
+    chasing = [(ex, ey, collide_dist) for kind, ex, ey, collide_dist, _, _ in rows if kind == _ENEMY]
+
+    tried = 0
+    for tried, d_ang in enumerate(devs, 1):
+        move_ang = (angle+d_ang)%360
+        cos = COS[move_ang]
+        sin = SIN[move_ang]
+        x = sx + speed*cos
+        y = sy + speed*sin
+
+        if x < 0 or x > width or y < 0 or y > height:
+            continue
+
+        if short and collision.segment_circles(sx, sy, x, y, short) >= 0:
+            continue
+        if whole and collision.segment_circles(sx, sy, sx + full*cos, sy + full*sin, whole) >= 0:
+            continue
+        if moving and collision.path_circles(sx, sy, x, y, moving) >= 0:
+            continue
+        if chasing and collision.pursuit_circles(sx, sy, x, y, chasing, MAX_SPEED) >= 0:
+            continue
+        instrument.count('nav.angles', tried)
+        return move_ang, x, y
+
+    instrument.count('nav.angles', tried)
+    return None
+
+#With analytic set (the default), headings blocked by static obstacles are ruled out from their blocked arcs up front
+#instead of being stepped through one degree at a time. The chosen heading is the same either way.
+@instrument.timed('nav')
+def nav(ship, targ, gmap, obs, move_table={}, speed=MAX_SPEED, max_deviation=90, analytic=True):
     dist = ship.dist_to(targ)
     angle = round(ship.angle_to(targ))
     speed = speed if (dist >= speed) else int(dist)
 
     if obs == None:
-        obs = [e for e in gmap.all_planets() + gmap.my_dships()
-                if ship.dist_to(e)-ship.radius-e.radius <= dist]
-        obs.extend([e for e in gmap.my_uships() if e != ship
-                        and ship.dist_to(e)-ship.radius-e.radius<=MAX_SPEED*2])
+        obs = _obstacles(ship, gmap, dist)
 
 
-    obs = sorted(obs,key=lambda t:ship.dist_to(t))
-    angs = [int(n/2) if n%2==0 else -int(n/2) for n in range(1,max_deviation*2+2)]
+    rows = _obstacle_rows(ship, obs, move_table, speed=speed, full=dist)
+    if analytic:
+        devs = _free_deviations(ship, rows, angle, max_deviation, speed, dist)
+    else:
+        devs = _deviations(max_deviation)
 
-    for d_ang in angs:
+    found = _sweep(ship, gmap, rows, angle, devs, speed, dist)
+    if found is None:
+        return None, None
 
-        move_ang = (angle+d_ang)%360
-        d = Point.polar(speed, move_ang)
-        move = Seg(ship.loc,ship.loc+d)
-
-        d = Point.polar(dist,move_ang)
-        full_move = Seg(ship.loc,ship.loc+d)
-        
-        if not gmap.contains_pt(move.p2):
-            continue
-
-        for e in obs:
-            collide_dist = ship.radius+e.radius+.000001
-            if e in move_table and min_dist(move,move_table[e]) <= collide_dist:
-                break
-            elif not e in move_table:
-                if type(e) == Ship and e.can_atk():
-                    if ps_dist(e.loc,move)<=collide_dist:
-                        break
-                elif ps_dist(e.loc,full_move) <=collide_dist:
-                    break
-        else:
-            return ship.thrust(speed,move_ang), move
-
-    return None, None
+    move_ang, x, y = found
+    return ship.thrust(speed,move_ang), Seg(ship.loc,Point(x,y))
 
-def harass_nav(ship, targ, gmap,obs,move_table={}, speed=MAX_SPEED,max_deviation=180, enemies = []):
+@instrument.timed('harass_nav')
+def harass_nav(ship, targ, gmap,obs,move_table={}, speed=MAX_SPEED,max_deviation=180, enemies = [], analytic=True):
     dist = ship.dist_to(targ)
     angle = round(ship.angle_to(targ))
 
     if obs == None:
-        obs = [e for e in gmap.all_planets() + gmap.my_dships()
-                if ship.dist_to(e)-ship.radius-e.radius <= max(MAX_SPEED,dist)]
-        obs.extend([e for e in gmap.my_uships() if e != ship
-                        and ship.dist_to(e)-ship.radius-e.radius<=MAX_SPEED*2])
-
-
-    obs = sorted(obs,key=lambda t:ship.dist_to(t))
-    angs = [int(n/2) if n%2==0 else -int(n/2) for n in range(1,max_deviation*2+2)]
+        obs = _obstacles(ship, gmap, max(MAX_SPEED,dist))
 
 
+    obs = list(obs)
     obs.extend(enemies)
-    obs.extend([t for t in gmap.all_dships() if ship.dist_to(t)<= MAX_SPEED+WEAPON_RADIUS])
-
-    for d_ang in angs:
-        move_ang = (angle+d_ang)%360
-        d = Point.polar(speed, move_ang)
-        move = Seg(ship.loc,ship.loc+d)
+    obs.extend(gmap.within(ship.loc, MAX_SPEED+WEAPON_RADIUS, spatial.ships(undocked=False)))
 
-        full_d = Point.polar(max(MAX_SPEED,dist),move_ang)
-        full_move = Seg(ship.loc,ship.loc+full_d)
-        if not gmap.contains_pt(move.p2):
-            continue
+    rows = _obstacle_rows(ship, obs, move_table, targ, enemies, speed, max(MAX_SPEED,dist))
+    if analytic:
+        devs = _free_deviations(ship, rows, angle, max_deviation, speed, max(MAX_SPEED,dist))
+    else:
+        devs = _deviations(max_deviation)
 
-        for e in obs:
-            collide_dist = ship.radius+e.radius+.000001
-            if e in enemies:
-                en_speed = pp_dist(e.loc,move.p2) if pp_dist(e.loc,move.p2) < MAX_SPEED else MAX_SPEED
-                en_move = Seg(e.loc,e.loc+Point.polar(en_speed,e.angle_to(Position(move.p2))))
-                if ship.dist_to(e) <= collide_dist+WEAPON_RADIUS:
-                    pass
-                elif min_dist(move,en_move) <= collide_dist + WEAPON_RADIUS:
-                    break
-            elif e == targ:
-                if ps_dist(e.loc,move)<=collide_dist:
-                    break
-            elif e in move_table and min_dist(move,move_table[e]) <= collide_dist:
-                break
-            elif not e in move_table:
-                if type(e) == Ship and e.can_atk():
-                    if ps_dist(e.loc,move)<=collide_dist:
-                        break
-                elif ps_dist(e.loc,full_move) <=collide_dist:
-                    break
-        else:
-            return ship.thrust(speed,move_ang), move
+    found = _sweep(ship, gmap, rows, angle, devs, speed, max(MAX_SPEED,dist))
+    if found is None:
+        return None, None
 
-    return None, None
+    move_ang, x, y = found
+    return ship.thrust(speed,move_ang), Seg(ship.loc,Point(x,y))
 
 def num_hits(ship):
     return math.ceil(ship.hp/WEAPON_DAMAGE)
@@ -0,0 +1,166 @@
+import cProfile
+import contextlib
+import functools
+import json
+import pstats
+import time
+
+# The recorder the module-level hooks report to, None while instrumentation is off
+_active = None
+
+
+class Recorder:
+    """
+    Named timers and counters collected one turn at a time. Each finished turn becomes one compact record,
+    written as a JSON line if an output file is given, so the turns and phases that blow the budget can be
+    picked out afterwards.
+
+    :ivar records: The records of the finished turns, if there is no output file
+    """
+
+    def __init__(self, out=None, profile=0, clock=time.process_time):
+        """
+        :param out: A text file to write one JSON line per turn to. If None, records are kept in records.
+        :param int profile: If set, run cProfile during every turn and add this many of the functions with the
+            most cumulative time to the record
+        :param function clock: The clock to time with
+        """
+        self._out = out
+        self._profile = profile
+        self._clock = clock
+        self.records = []
+        self._turn = None
+        self._start = 0
+        self._timers = {}
+        self._counters = {}
+        self._profiler = None
+
+    def begin_turn(self, turn):
+        """
+        :param int turn: The number of the turn starting
+        :return: nothing
+        """
+        self._turn = turn
+        self._timers = {}
+        self._counters = {}
+        if self._profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = self._clock()
+
+    def end_turn(self):
+        """
+        Finish the turn and write out its record.
+
+        :return: The record
+        :rtype: dict
+        """
+        record = {'turn': self._turn, 'time': round(self._clock() - self._start, 6),
+                  'timers': {name: round(t, 6) for name, t in self._timers.items()},
+                  'counters': self._counters}
+        if self._profiler is not None:
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler).sort_stats('cumulative')
+            record['profile'] = [['{}:{}:{}'.format(*func), calls, round(cumtime, 6)]
+                                 for func, (_, calls, _, cumtime, _) in
+                                 sorted(stats.stats.items(), key=lambda item: -item[1][3])[:self._profile]]
+            self._profiler = None
+        if self._out is None:
+            self.records.append(record)
+        else:
+            self._out.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self._out.flush()
+        return record
+
+    def add_time(self, name, seconds):
+        """
+        :param str name: The timer to add to
+        :param float seconds: The time to add
+        :return: nothing
+        """
+        self._timers[name] = self._timers.get(name, 0) + seconds
+
+    def count(self, name, n=1):
+        """
+        :param str name: The counter to add to
+        :param int n: The amount to add
+        :return: nothing
+        """
+        self._counters[name] = self._counters.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """
+        Time a block of code, e.g. with recorder.timer('parse'): ...
+
+        :param str name: The timer to add the block's time to
+        """
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.add_time(name, self._clock() - start)
+
+
+def activate(recorder):
+    """
+    Send the module-level hooks to a recorder.
+
+    :param Recorder recorder: The recorder, or None to turn instrumentation off
+    :return: nothing
+    """
+    global _active
+    _active = recorder
+
+
+def active():
+    """
+    :return: The recorder the hooks report to, None if instrumentation is off
+    :rtype: Recorder
+    """
+    return _active
+
+
+def add_time(name, seconds):
+    if _active is not None:
+        _active.add_time(name, seconds)
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+def timer(name):
+    """
+    :param str name: The timer to add the block's time to
+    :return: A context manager timing its block, which does nothing while instrumentation is off
+    """
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.timer(name)
+
+
+def timed(name):
+    """
+    Decorate a function to add the time of every call to a timer and count the calls.
+
+    :param str name: The timer, and the counter name.calls
+    :return: The decorator
+    """
+    calls = name + '.calls'
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _active
+            if recorder is None:
+                return fn(*args, **kwargs)
+            start = recorder._clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                recorder.add_time(name, recorder._clock() - start)
+                recorder.count(calls)
+        return wrapper
+    return decorate
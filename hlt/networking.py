@@ -1,8 +1,40 @@
-import sys
+import atexit
 import logging
-import copy
+import logging.handlers
+import queue
 
-from . import game_map
+from . import game_map, instrument
+from .speculation import Speculation
+from .transport import PipeTransport
+
+
+# Argument types which cannot change between logging a record and writing it
+_SCALARS = (int, float, str, bool, type(None))
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for a writer thread. Records whose arguments are all plain numbers or strings are queued as they
+    are and formatted by the writer; others are formatted first, since their arguments may change before the
+    writer gets to them.
+    """
+    def prepare(self, record):
+        if isinstance(record.args, tuple) and all(type(arg) in _SCALARS for arg in record.args):
+            return record
+        return super().prepare(record)
+
+
+def _queued(handler):
+    """
+    :param logging.Handler handler: The handler which does the writing
+    :return: A handler which passes records to a background thread running the given one, and the listener
+        running that thread
+    :rtype: (logging.Handler, logging.handlers.QueueListener)
+    """
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+    return _DeferredQueueHandler(records), listener
 
 
 class Game:
@@ -10,77 +42,82 @@ class Game:
     :ivar map: Current map representation
     :ivar initial_map: The initial version of the map before game starts
     """
-    @staticmethod
-    def _send_string(s):
+    def _send_line(self, line):
         """
-        Send data to the game. Call :function:`done_sending` once finished.
+        Send one line to the game.
 
-        :param str s: String to send
+        :param str line: The line to send
         :return: nothing
         """
-        sys.stdout.write(s)
+        self._transport.write_line(line)
 
-    @staticmethod
-    def _done_sending():
-        """
-        Finish sending commands to the game.
-
-        :return: nothing
-        """
-        sys.stdout.write('\n')
-        sys.stdout.flush()
-
-    @staticmethod
-    def _get_string():
+    def _get_string(self):
         """
         Read input from the game.
 
         :return: The input read from the Halite engine
-        :rtype: str
+        :rtype: bytes
         """
-        result = sys.stdin.readline().rstrip('\n')
-        return result
+        return self._transport.read_line()
 
-    @staticmethod
-    def send_command_queue(command_queue):
+    def send_command_queue(self, command_queue):
         """
         Issue the given list of commands.
 
         :param list[str] command_queue: List of commands to send the Halite engine
         :return: nothing
         """
-        for command in command_queue:
-            Game._send_string(command)
-
-        Game._done_sending()
+        with instrument.timer('send'):
+            self._send_line(''.join(command_queue))
 
     @staticmethod
-    def _set_up_logging(tag, name):
+    def _set_up_logging(tag, name, log='file'):
         """
         Set up and truncate the log
 
         :param tag: The user tag (used for naming the log)
         :param name: The bot name (used for naming the log)
+        :param str log: 'file' to write every record as it is made, 'queue' to hand records to a background
+            writer thread (which takes the writing off this thread but costs more CPU in all), 'off' to turn
+            logging off altogether for production
         :return: nothing
         """
+        if log == 'off':
+            logging.disable(logging.CRITICAL)
+            return
         log_file = "{}_{}.log".format(tag, name)
-        logging.basicConfig(filename=log_file, level=logging.DEBUG, filemode='w',format='%(message)s')
-        logging.info("Initialized bot {}".format(name))
-
-    def __init__(self, name):
+        if log == 'queue':
+            handler = logging.FileHandler(log_file, mode='w')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            handler, listener = _queued(handler)
+            atexit.register(listener.stop)
+            logging.basicConfig(level=logging.DEBUG, handlers=[handler])
+        else:
+            logging.basicConfig(filename=log_file, level=logging.DEBUG, filemode='w',format='%(message)s')
+        logging.info("Initialized bot %s", name)
+
+    def __init__(self, name, incremental=False, transport=None, log='file'):
         """
         Initialize the bot with the given name.
 
         :param name: The name of the bot.
+        :param bool incremental: Update the ships, planets and players of the map in place each turn instead of
+            rebuilding them, so entities keep their identity across turns.
+        :param transport.Transport transport: How to talk to the engine, stdin and stdout if None
+        :param str log: How to log: 'file', 'queue' or 'off' (see _set_up_logging)
         """
         self._name = name
+        self._incremental = incremental
+        self._transport = PipeTransport() if transport is None else transport
+        self._speculation = None
+        self._last_speculation = None
         self._send_name = False
         tag = int(self._get_string())
-        Game._set_up_logging(tag, name)
+        Game._set_up_logging(tag, name, log)
         width, height = [int(x) for x in self._get_string().strip().split()]
         self.map = game_map.Map(tag, width, height)
         self.update_map()
-        self.initial_map = copy.deepcopy(self.map)
+        self.initial_map = self.map.fork()
         self._send_name = True
 
     def update_map(self):
@@ -91,9 +128,39 @@ class Game:
         :rtype: game_map.Map
         """
         if self._send_name:
-            self._send_string(self._name)
-            self._done_sending()
+            self._send_line(self._name)
             self._send_name = False
         logging.info("---NEW TURN---")
-        self.map._parse(self._get_string())
+        line = self._get_string()
+        if self._speculation is not None:
+            self._speculation.stop.set()
+        self._last_speculation, self._speculation = self._speculation, None
+        with instrument.timer('parse'):
+            if self._incremental:
+                self.map._update(line)
+            else:
+                self.map._parse(line)
         return self.map
+
+    def speculate(self, fn, validate=None):
+        """
+        Start work to run while waiting for the next frame, typically right after send_command_queue. The
+        work runs on a background thread on a fork of the current map, and its result can be picked up with
+        speculation() once the next frame is parsed.
+
+        :param function fn: fn(gmap, stop), the work. It should give up once the threading.Event stop is set.
+        :param function validate: validate(result, gmap), whether the result holds for the real next frame
+        :return: nothing
+        """
+        if self._speculation is not None:
+            self._speculation.stop.set()
+        self._speculation = Speculation(fn, self.map.fork(), validate)
+
+    def speculation(self, wait=0):
+        """
+        :param float wait: Seconds to wait for the work to finish
+        :return: The validated result of the work started before the current frame, or None
+        """
+        if self._last_speculation is None:
+            return None
+        return self._last_speculation.result(self.map, wait)
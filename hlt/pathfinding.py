@@ -1,24 +1,359 @@
+import heapq
+import math
+from array import array
+from collections.abc import Mapping
 from .geom import pp_dist
 from .geom import Point
 from .game_map import Map
-from . import constants
+from . import collision, constants
+
+# Moves to the 8 neighbouring cells: (di, dj, cost in cells)
+_STEPS = ((1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+          (1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (-1, -1, math.sqrt(2)))
 
 class Graph:
     # Bottom-Left is (0,0)
-    def __init__(self, map, size=1):
-        self.nodes = {Point(i,j) : self.Node(Point(i,j)) 
-                      for i in range(0,map.width,size) 
-                      for j in range(0,map.height,size)}
+    def __init__(self, map, size=1, clearance=constants.SHIP_RADIUS + .1, docked=False):
+        """
+        Cells are plain indices into flat arrays and neighbours are worked out arithmetically, so building a
+        graph only costs marking the cells covered by obstacles.
+
+        :param game_map.Map map: The map to cover, usually the initial map
+        :param int size: The spacing of the grid points
+        :param float clearance: How far a path keeps from the surface of what it avoids
+        :param bool docked: Also avoid the map's docked ships
+        """
+        self.width = map.width
+        self.height = map.height
+        self.clearance = clearance
+        discs = [(p.loc.x, p.loc.y, p.radius + clearance) for p in map.all_planets()]
+        if docked:
+            discs.extend((s.loc.x, s.loc.y, s.radius + clearance) for s in map.all_dships())
+        self._levels = {}
+        self._lay_out(size, discs)
+
+    def _lay_out(self, size, discs):
+        # Grid point (i*size, j*size) is cell i*rows + j; a cell is blocked if its point is inside an obstacle
+        self.size = size
+        self.cols = len(range(0, self.width, size))
+        self.rows = len(range(0, self.height, size))
+        self.nodes = self.Nodes(self)
+        self._discs = discs
+        self.blocked = self._block(discs)
+        self._routes = {}
+        self._levels[size] = self
+
+    def _block(self, discs):
+        # Mark each disc a column at a time: the covered cells of a column are one run of the flat array
+        size = self.size
+        rows = self.rows
+        blocked = bytearray(self.cols*rows)
+        for x, y, r in discs:
+            for i in range(max(0, math.ceil((x - r)/size)), min(self.cols - 1, math.floor((x + r)/size)) + 1):
+                dx2 = (i*size - x)**2
+                h = math.sqrt(max(0, r*r - dx2))
+                lo = max(0, math.ceil((y - h)/size))
+                hi = min(rows - 1, math.floor((y + h)/size))
+                # Settle the rounding at the ends of the run with the exact test
+                while lo <= hi and dx2 + (lo*size - y)**2 > r*r:
+                    lo += 1
+                while hi >= lo and dx2 + (hi*size - y)**2 > r*r:
+                    hi -= 1
+                if lo <= hi:
+                    blocked[i*rows + lo:i*rows + hi + 1] = b'\x01'*(hi - lo + 1)
+        return blocked
 
-        plist = [Point(1,0), Point(-1,0), Point(0,1), Point(0,-1)]
+    def level(self, size):
+        """
+        The graph over the same obstacles at another resolution, e.g. coarse cells for long hauls and fine
+        cells close to planets. Levels are built on first use and shared.
 
-        for k,n in self.nodes.items():
-            for p in plist:
-                if n.loc+p in self.nodes:
-                    n.adj.append(self.nodes[n.loc+p])
+        :param int size: The spacing of the grid points
+        :return: The graph at that spacing
+        :rtype: Graph
+        """
+        if size not in self._levels:
+            graph = Graph.__new__(Graph)
+            graph.width = self.width
+            graph.height = self.height
+            graph.clearance = self.clearance
+            graph._levels = self._levels
+            graph._lay_out(size, self._discs)
+        return self._levels[size]
 
     class Node:
-        def __init__(self, loc):
+        def __init__(self, loc, nodes=None):
             self.loc = loc
-            self.adj = []
+            self._nodes = nodes
+            self._adj = None
+
+        @property
+        def adj(self):
+            if self._adj is None:
+                self._adj = self._nodes.adjacent(self.loc) if self._nodes is not None else []
+            return self._adj
+
+    class Nodes(Mapping):
+        """
+        The grid points of a graph as a read-only mapping from Point to Node. Nodes are only made when asked
+        for, and kept so that the same point always gives the same node.
+        """
+
+        def __init__(self, graph):
+            self._graph = graph
+            self._made = {}
+
+        def _index(self, point):
+            size = self._graph.size
+            if point.x % size or point.y % size:
+                return None
+            i = int(point.x)//size
+            j = int(point.y)//size
+            if 0 <= i < self._graph.cols and 0 <= j < self._graph.rows:
+                return i, j
+            return None
+
+        def __getitem__(self, point):
+            if point not in self._made:
+                if self._index(point) is None:
+                    raise KeyError(point)
+                self._made[point] = Graph.Node(point, self)
+            return self._made[point]
+
+        def __contains__(self, point):
+            return isinstance(point, Point) and self._index(point) is not None
+
+        def __iter__(self):
+            size = self._graph.size
+            for i in range(self._graph.cols):
+                for j in range(self._graph.rows):
+                    yield Point(i*size, j*size)
+
+        def __len__(self):
+            return self._graph.cols*self._graph.rows
+
+        def adjacent(self, point):
+            """
+            :param geom.Point point: A grid point
+            :return: The nodes of the grid points next to it, along the axes
+            :rtype: list[Graph.Node]
+            """
+            size = self._graph.size
+            near = (Point(point.x + size, point.y), Point(point.x - size, point.y),
+                    Point(point.x, point.y + size), Point(point.x, point.y - size))
+            return [self[p] for p in near if p in self]
+
+    def cell(self, point):
+        """
+        :param geom.Point point: A point on the map
+        :return: The cell of the grid point nearest to it
+        :rtype: int
+        """
+        i = min(max(int(round(point.x/self.size)), 0), self.cols - 1)
+        j = min(max(int(round(point.y/self.size)), 0), self.rows - 1)
+        return i*self.rows + j
+
+    def point(self, cell):
+        """
+        :param int cell: A cell of the grid
+        :return: Its grid point
+        :rtype: geom.Point
+        """
+        i, j = divmod(cell, self.rows)
+        return Point(i*self.size, j*self.size)
+
+    def visible(self, p, q):
+        """
+        :param geom.Point p: One end of a straight move
+        :param geom.Point q: The other end
+        :return: True if the move keeps clear of every obstacle
+        :rtype: bool
+        """
+        return collision.segment_circles(p.x, p.y, q.x, q.y, self._discs) < 0
+
+    def _search(self, start, is_goal, estimate):
+        # A* over the free cells with 8-neighbour moves that never cut the corner of a blocked cell. Returns
+        # the cells from start to the first goal cell reached, or None.
+        blocked = self.blocked
+        rows = self.rows
+        cols = self.cols
+        g = array('d', [math.inf])*len(blocked)
+        parent = array('i', [-1])*len(blocked)
+        g[start] = 0
+        heap = [(estimate(start), 0.0, start)]
+        while heap:
+            _, gk, k = heapq.heappop(heap)
+            if gk > g[k]:
+                continue
+            if is_goal(k):
+                path = [k]
+                while parent[path[-1]] >= 0:
+                    path.append(parent[path[-1]])
+                return path[::-1]
+            i, j = divmod(k, rows)
+            for di, dj, cost in _STEPS:
+                ni = i + di
+                nj = j + dj
+                if 0 <= ni < cols and 0 <= nj < rows:
+                    nk = ni*rows + nj
+                    if blocked[nk] or (di and dj and (blocked[ni*rows + j] or blocked[i*rows + nj])):
+                        continue
+                    ng = gk + cost
+                    if ng < g[nk]:
+                        g[nk] = ng
+                        parent[nk] = k
+                        heapq.heappush(heap, (ng + estimate(nk), ng, nk))
+        return None
+
+    def _smooth(self, points):
+        # Any-angle shortcut: from each kept point, jump to the farthest later point in sight
+        smoothed = [points[0]]
+        k = 0
+        while k < len(points) - 1:
+            nxt = k + 1
+            for m in range(len(points) - 1, k + 1, -1):
+                if self.visible(points[k], points[m]):
+                    nxt = m
+                    break
+            smoothed.append(points[nxt])
+            k = nxt
+        return smoothed
+
+    def path(self, start, goal):
+        """
+        :param geom.Point start: Where to start
+        :param geom.Point goal: Where to go
+        :return: The waypoints after start up to goal's grid point, or None if there is no way there
+        :rtype: list[geom.Point]
+        """
+        target = self.cell(goal)
+        if self.blocked[target]:
+            return None
+        gi, gj = divmod(target, self.rows)
+
+        def estimate(k):
+            i, j = divmod(k, self.rows)
+            di = abs(i - gi)
+            dj = abs(j - gj)
+            return max(di, dj) + (math.sqrt(2) - 1)*min(di, dj)
+
+        cells = self._search(self.cell(start), lambda k: k == target, estimate)
+        if cells is None:
+            return None
+        return self._smooth([start] + [self.point(k) for k in cells[1:]])[1:]
+
+    def route(self, start, planet):
+        """
+        The way to a planet's docking range, cached by start cell and planet.
+
+        :param geom.Point start: Where to start
+        :param entity.Planet planet: The planet to go to
+        :return: The waypoints after start, or None if there is no way there
+        :rtype: list[geom.Point]
+        """
+        start_cell = self.cell(start)
+        key = (start_cell, planet.id)
+        if key not in self._routes:
+            x = planet.loc.x
+            y = planet.loc.y
+            reach = planet.radius + constants.DOCK_RADIUS
+            size = self.size
+
+            def distance(k):
+                i, j = divmod(k, self.rows)
+                return math.sqrt((i*size - x)**2 + (j*size - y)**2)
+
+            cells = self._search(start_cell, lambda k: distance(k) <= reach,
+                                 lambda k: max(0, (distance(k) - reach)/size))
+            if cells is None:
+                self._routes[key] = None
+            else:
+                self._routes[key] = self._smooth([self.point(k) for k in cells])[1:]
+        return self._routes[key]
+
+
+class FlowField:
+    """
+    The shortest ways from every cell of a graph to one planet's docking range, computed once (planets never
+    move) so that any ship can look up where to head next in O(1).
+
+    :ivar planet_id: The id of the planet
+    :ivar dist: The length of the shortest way from each cell to the docking range, in cells (inf if none)
+    :ivar far: For each cell, the farthest cell along its shortest way that is in a straight line of sight
+    """
+
+    def __init__(self, graph, planet):
+        """
+        :param Graph graph: The grid to route over
+        :param entity.Planet planet: The planet to route to
+        """
+        self.graph = graph
+        self.planet_id = planet.id
+        blocked = graph.blocked
+        rows = graph.rows
+        cols = graph.cols
+        size = graph.size
+        x = planet.loc.x
+        y = planet.loc.y
+        reach = planet.radius + constants.DOCK_RADIUS
+
+        # Dijkstra outward from every free cell in docking range
+        self.dist = dist = array('d', [math.inf])*len(blocked)
+        parent = array('i', [-1])*len(blocked)
+        heap = []
+        for i in range(max(0, math.ceil((x - reach)/size)), min(cols - 1, math.floor((x + reach)/size)) + 1):
+            for j in range(max(0, math.ceil((y - reach)/size)), min(rows - 1, math.floor((y + reach)/size)) + 1):
+                k = i*rows + j
+                if not blocked[k] and (i*size - x)**2 + (j*size - y)**2 <= reach*reach:
+                    dist[k] = 0
+                    heap.append((0.0, k))
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            d, k = heapq.heappop(heap)
+            if d > dist[k]:
+                continue
+            order.append(k)
+            i, j = divmod(k, rows)
+            for di, dj, cost in _STEPS:
+                ni = i + di
+                nj = j + dj
+                if 0 <= ni < cols and 0 <= nj < rows:
+                    nk = ni*rows + nj
+                    if blocked[nk] or (di and dj and (blocked[ni*rows + j] or blocked[i*rows + nj])):
+                        continue
+                    if d + cost < dist[nk]:
+                        dist[nk] = d + cost
+                        parent[nk] = k
+                        heapq.heappush(heap, (d + cost, nk))
+
+        # Cells are settled after their parents, so each can reuse its parent's farthest visible cell
+        self.far = far = array('i', [-1])*len(blocked)
+        for k in order:
+            p = parent[k]
+            if p < 0:
+                far[k] = k
+            elif graph.visible(graph.point(k), graph.point(far[p])):
+                far[k] = far[p]
+            else:
+                far[k] = p
+
+    def distance(self, point):
+        """
+        :param geom.Point point: A point on the map
+        :return: The length of the shortest way from it to the docking range (inf if none)
+        :rtype: float
+        """
+        return self.dist[self.graph.cell(point)]*self.graph.size
 
+    def waypoint(self, point):
+        """
+        :param geom.Point point: A point on the map
+        :return: The next waypoint towards the planet, or None if the docking range is in sight (or there is
+            no way there) and the ship can head straight for the planet
+        :rtype: geom.Point
+        """
+        k = self.far[self.graph.cell(point)]
+        if k < 0 or self.dist[k] == 0:
+            return None
+        return self.graph.point(k)
@@ -0,0 +1,322 @@
+import math
+from array import array
+from bisect import bisect_right
+from . import entity
+from .combat import Volley
+from .geom import polar_xy
+from .constants import (BASE_PRODUCTIVITY, BASE_SHIP_HEALTH, DOCK_RADIUS, DOCK_TURNS, EXPLOSION_RADIUS,
+                        MAX_SHIP_HEALTH, MAX_SPEED, PRODUCTION_PER_SHIP, SHIP_RADIUS, SPAWN_RADIUS,
+                        WEAPON_COOLDOWN)
+
+UNDOCKED, DOCKING, DOCKED, UNDOCKING = (s.value for s in entity.Ship.DockingStatus)
+
+# The per-ship columns, with their array type codes
+_SHIP_COLUMNS = (('x', 'd'), ('y', 'd'), ('hp', 'd'), ('owner', 'i'), ('status', 'i'), ('planet', 'i'),
+                 ('progress', 'i'), ('cooldown', 'i'))
+# The per-planet columns
+_PLANET_COLUMNS = (('px', 'd'), ('py', 'd'), ('pradius', 'd'), ('php', 'd'), ('powner', 'i'), ('pspots', 'i'),
+                   ('pcurrent', 'i'), ('premaining', 'i'))
+
+
+def _contact(dx, dy, vx, vy, r):
+    # The first time in [0, 1] at which a point at (dx, dy) moving at (vx, vy) comes within r of the origin
+    a = vx*vx + vy*vy
+    if a == 0:
+        return None
+    b = dx*vx + dy*vy
+    c = dx*dx + dy*dy - r*r
+    disc = b*b - a*c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc))/a
+    return t if 0 <= t <= 1 else None
+
+
+class State:
+    """
+    A forward model of the game on plain arrays, cheap enough to clone and step many times a turn for
+    rollouts. Ship rows are kept dense: ships destroyed during a step are dropped at the end of it and
+    spawned ships are appended. Planet rows never move; destroyed planets keep their row with php <= 0.
+
+    The physics follow the engine: thrust, continuous ship-ship and ship-planet collisions, simultaneous
+    weapon fire with cooldown, docking and undocking over DOCK_TURNS, production and spawning, and planet
+    explosions, whose damage falls off linearly over EXPLOSION_RADIUS from the planet's surface.
+
+    :ivar width: Map width
+    :ivar height: Map height
+    :ivar ids: The id of each ship row
+    :ivar x: The x-coordinate of each ship row (likewise y)
+    :ivar hp: The health of each ship row
+    :ivar owner: The owner's player id of each ship row
+    :ivar status: The docking status value of each ship row
+    :ivar planet: The planet row each ship is docked to, -1 if none
+    :ivar progress: The turns left until each ship finishes docking or undocking
+    :ivar cooldown: The turns left until each ship can fire again
+    :ivar planet_ids: The id of each planet row
+    :ivar px: The x-coordinate of each planet row (likewise py, pradius, php)
+    :ivar powner: The owner's player id of each planet row, -1 if unowned
+    :ivar pspots: The docking spots of each planet row
+    :ivar pcurrent: The production each planet has built up towards its next ship
+    :ivar premaining: The production each planet has left
+    :ivar next_id: The id the next spawned ship gets
+    """
+
+    def __init__(self, width, height):
+        """
+        :param width: Map width
+        :param height: Map height
+        """
+        self.width = width
+        self.height = height
+        self.ids = []
+        self.planet_ids = []
+        self.next_id = 0
+        for name, code in _SHIP_COLUMNS + _PLANET_COLUMNS:
+            setattr(self, name, array(code))
+
+    @classmethod
+    def from_map(cls, gmap):
+        """
+        :param game_map.Map gmap: The map to model
+        :return: The state of the map's current frame
+        :rtype: State
+        """
+        state = cls(gmap.width, gmap.height)
+        planets = gmap.all_planets()
+        rows = {p: i for i, p in enumerate(planets)}
+        for p in planets:
+            state.planet_ids.append(p.id)
+            state.px.append(p.loc.x)
+            state.py.append(p.loc.y)
+            state.pradius.append(p.radius)
+            state.php.append(p.hp)
+            state.powner.append(-1 if p.owner is None else p.owner.id)
+            state.pspots.append(p.num_docking_spots)
+            state.pcurrent.append(p.current_production)
+            state.premaining.append(p.remaining_resources)
+        for s in gmap.all_ships():
+            state.ids.append(s.id)
+            state.x.append(s.loc.x)
+            state.y.append(s.loc.y)
+            state.hp.append(s.hp)
+            state.owner.append(s.owner.id)
+            state.status.append(s.docking_status.value)
+            state.planet.append(rows.get(s.planet, -1))
+            state.progress.append(s._docking_progress)
+            state.cooldown.append(s._weapon_cooldown)
+        state.next_id = max(state.ids, default=-1) + 1
+        return state
+
+    def clone(self):
+        """
+        :return: An independent copy of the state
+        :rtype: State
+        """
+        state = State.__new__(State)
+        state.width = self.width
+        state.height = self.height
+        state.ids = self.ids[:]
+        state.planet_ids = self.planet_ids
+        state.next_id = self.next_id
+        for name, _ in _SHIP_COLUMNS + _PLANET_COLUMNS:
+            setattr(state, name, getattr(self, name)[:])
+        return state
+
+    @property
+    def num_ships(self):
+        return len(self.ids)
+
+    def row(self, ship_id):
+        """
+        :param int ship_id: The id of a ship
+        :return: The row of the ship, or None if it is not alive
+        :rtype: int
+        """
+        try:
+            return self.ids.index(ship_id)
+        except ValueError:
+            return None
+
+    def simulate(self, queues):
+        """
+        Play several turns on a copy of the state.
+
+        :param list[list[str]] queues: The command queue of every turn, as sent to the engine
+        :return: The state after the last turn
+        :rtype: State
+        """
+        state = self.clone()
+        for commands in queues:
+            state.step(commands)
+        return state
+
+    def step(self, commands=()):
+        """
+        Play one turn in place.
+
+        :param list[str] commands: The commands of every player for this turn, as sent to the engine
+        :return: nothing
+        """
+        n = len(self.ids)
+        vx = [0.0]*n
+        vy = [0.0]*n
+        rows = {sid: i for i, sid in enumerate(self.ids)}
+        planet_rows = {pid: j for j, pid in enumerate(self.planet_ids)}
+        for i in range(n):
+            if self.cooldown[i] > 0:
+                self.cooldown[i] -= 1
+
+        for cmd in commands:
+            parts = cmd.split()
+            i = rows.get(int(parts[1]))
+            if i is None:
+                continue
+            if parts[0] == 't':
+                if self.status[i] == UNDOCKED:
+                    vx[i], vy[i] = polar_xy(min(int(parts[2]), MAX_SPEED), int(parts[3]) % 360)
+            elif parts[0] == 'd':
+                j = planet_rows.get(int(parts[2]))
+                if j is not None:
+                    self._dock(i, j)
+            elif parts[0] == 'u':
+                if self.status[i] == DOCKED:
+                    self.status[i] = UNDOCKING
+                    self.progress[i] = DOCK_TURNS
+
+        self._move(vx, vy)
+        self._remove_dead()
+        volley = Volley(self, cooldown=self.cooldown)
+        self.hp = volley.hp
+        for i in volley.fired:
+            self.cooldown[i] = WEAPON_COOLDOWN
+        self._remove_dead()
+        self._progress()
+        self._produce()
+
+    def _docked(self, j):
+        # The number of ships docked, docking or undocking at planet row j
+        return sum(1 for p in self.planet if p == j)
+
+    def _dock(self, i, j):
+        if (self.status[i] != UNDOCKED or self.php[j] <= 0
+                or math.sqrt((self.x[i] - self.px[j])**2 + (self.y[i] - self.py[j])**2) > self.pradius[j] + DOCK_RADIUS
+                or self.powner[j] not in (-1, self.owner[i]) or self._docked(j) >= self.pspots[j]):
+            return
+        self.status[i] = DOCKING
+        self.progress[i] = DOCK_TURNS
+        self.planet[i] = j
+        self.powner[j] = self.owner[i]
+
+    def _move(self, vx, vy):
+        xs, ys, hp = self.x, self.y, self.hp
+        n = len(xs)
+        events = []
+
+        # Ship-ship contacts, sweeping in x order over the pairs that can meet this turn
+        order = sorted(range(n), key=xs.__getitem__)
+        sorted_x = [xs[i] for i in order]
+        reach = 2*MAX_SPEED + 2*SHIP_RADIUS
+        for k, i in enumerate(order):
+            for j in order[k + 1:bisect_right(sorted_x, xs[i] + reach)]:
+                if (vx[i] or vy[i] or vx[j] or vy[j]) and abs(ys[j] - ys[i]) <= reach:
+                    t = _contact(xs[j] - xs[i], ys[j] - ys[i], vx[j] - vx[i], vy[j] - vy[i], 2*SHIP_RADIUS)
+                    if t is not None:
+                        events.append((t, i, j, False))
+
+        # Ship-planet contacts
+        for i in range(n):
+            if vx[i] or vy[i]:
+                for j in range(len(self.px)):
+                    if self.php[j] > 0 and abs(self.px[j] - xs[i]) <= MAX_SPEED + SHIP_RADIUS + self.pradius[j]:
+                        t = _contact(xs[i] - self.px[j], ys[i] - self.py[j], vx[i], vy[i],
+                                     SHIP_RADIUS + self.pradius[j])
+                        if t is not None:
+                            events.append((t, i, j, True))
+
+        # Resolve the contacts in time order; a destroyed entity takes no part in later ones
+        events.sort()
+        for t, i, j, planet in events:
+            if hp[i] <= 0:
+                continue
+            if planet:
+                if self.php[j] > 0:
+                    self.php[j] -= hp[i]
+                    hp[i] = 0
+            elif hp[j] > 0:
+                hp[i], hp[j] = hp[i] - hp[j], hp[j] - hp[i]
+
+        for i in range(n):
+            if hp[i] > 0:
+                xs[i] += vx[i]
+                ys[i] += vy[i]
+                if not (0 <= xs[i] <= self.width and 0 <= ys[i] <= self.height):
+                    hp[i] = 0
+
+    def _remove_dead(self):
+        # Explode destroyed planets, then drop the destroyed ships
+        for j in range(len(self.php)):
+            if self.php[j] <= 0 and self.pradius[j] > 0:
+                self._explode(j)
+        keep = [i for i in range(len(self.ids)) if self.hp[i] > 0]
+        if len(keep) == len(self.ids):
+            return
+        self.ids = [self.ids[i] for i in keep]
+        for name, code in _SHIP_COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array(code, [column[i] for i in keep]))
+
+    def _explode(self, j):
+        x, y, r = self.px[j], self.py[j], self.pradius[j]
+        self.pradius[j] = 0
+        self.powner[j] = -1
+        for i in range(len(self.ids)):
+            if self.planet[i] == j:
+                self.hp[i] = 0
+                continue
+            d = math.sqrt((self.x[i] - x)**2 + (self.y[i] - y)**2) - r
+            if d <= EXPLOSION_RADIUS:
+                self.hp[i] -= MAX_SHIP_HEALTH*(1 - max(d, 0)/EXPLOSION_RADIUS)
+
+    def _progress(self):
+        for i in range(len(self.ids)):
+            if self.status[i] in (DOCKING, UNDOCKING):
+                self.progress[i] -= 1
+                if self.progress[i] <= 0:
+                    self.progress[i] = 0
+                    if self.status[i] == DOCKING:
+                        self.status[i] = DOCKED
+                    else:
+                        self.status[i] = UNDOCKED
+                        self.planet[i] = -1
+
+    def _produce(self):
+        docked = [0]*len(self.px)
+        attached = [0]*len(self.px)
+        for i in range(len(self.ids)):
+            j = self.planet[i]
+            if j >= 0:
+                attached[j] += 1
+                if self.status[i] == DOCKED:
+                    docked[j] += 1
+        for j in range(len(self.px)):
+            if not attached[j]:
+                self.powner[j] = -1
+            if not docked[j] or self.php[j] <= 0:
+                continue
+            made = min(BASE_PRODUCTIVITY*docked[j], self.premaining[j])
+            self.premaining[j] -= made
+            self.pcurrent[j] += made
+            while self.pcurrent[j] >= PRODUCTION_PER_SHIP:
+                self.pcurrent[j] -= PRODUCTION_PER_SHIP
+                self._spawn(j)
+
+    def _spawn(self, j):
+        # New ships appear just off the planet's surface, on the side facing the center of the map
+        angle = math.degrees(math.atan2(self.height/2 - self.py[j], self.width/2 - self.px[j]))
+        dx, dy = polar_xy(self.pradius[j] + SPAWN_RADIUS, angle)
+        self.ids.append(self.next_id)
+        self.next_id += 1
+        for name, value in (('x', self.px[j] + dx), ('y', self.py[j] + dy), ('hp', BASE_SHIP_HEALTH),
+                            ('owner', self.powner[j]), ('status', UNDOCKED), ('planet', -1), ('progress', 0),
+                            ('cooldown', 0)):
+            getattr(self, name).append(value)
@@ -0,0 +1,140 @@
+import math
+from array import array
+from . import entity
+
+
+class Snapshot:
+    """
+    A structure-of-arrays view of one frame. Row i of every column describes entities[i]. Ships come first,
+    in the order of Map.all_ships(), followed by the planets in the order of Map.all_planets().
+
+    :ivar entities: The entity of each row
+    :ivar num_ships: The number of ship rows; rows from num_ships on are planets
+    :ivar x: The x-coordinate of each row
+    :ivar y: The y-coordinate of each row
+    :ivar radius: The radius of each row
+    :ivar hp: The health of each row
+    :ivar owner: The owner's player id of each row, -1 if unowned
+    :ivar status: The docking status value of each ship row, -1 for planets
+    :ivar planet: The id of the planet a ship is docked to (-1 if undocked), or the planet's own id
+    """
+
+    def __init__(self, ships, planets):
+        """
+        :param list[entity.Ship] ships: The ships of the frame
+        :param list[entity.Planet] planets: The planets of the frame
+        """
+        self.entities = list(ships) + list(planets)
+        self.num_ships = len(ships)
+        self.x = array('d', [e.loc.x for e in self.entities])
+        self.y = array('d', [e.loc.y for e in self.entities])
+        self.radius = array('d', [e.radius for e in self.entities])
+        self.hp = array('d', [e.hp for e in self.entities])
+        self.owner = array('i', [-1 if e.owner is None else e.owner.id for e in self.entities])
+        self.status = array('i', [s.docking_status.value for s in ships] + [-1]*len(planets))
+        self.planet = array('i', [-1 if s.planet is None else s.planet.id for s in ships] +
+                            [p.id for p in planets])
+        self._rows = {e: i for i, e in enumerate(self.entities)}
+
+    @classmethod
+    def from_map(cls, gmap):
+        """
+        :param game_map.Map gmap: The map to take the snapshot of
+        :return: The snapshot of the map's current frame
+        :rtype: Snapshot
+        """
+        return cls(gmap.all_ships(), gmap.all_planets())
+
+    def __len__(self):
+        return len(self.entities)
+
+    def row(self, e):
+        """
+        :param entity.Entity e: An entity of the frame
+        :return: The row of the entity, or None if it is not part of the snapshot
+        :rtype: int
+        """
+        return self._rows.get(e)
+
+    def rows(self, entities):
+        """
+        :param list[entity.Entity] entities: Entities of the frame
+        :return: The rows of the entities
+        :rtype: list[int]
+        """
+        return [self._rows[e] for e in entities]
+
+    def select(self, owner=None, not_owner=None, ships=True, planets=False, undocked=None):
+        """
+        Select rows by kind, ownership and docking status.
+
+        :param int owner: Only keep rows owned by this player id
+        :param int not_owner: Drop rows owned by this player id
+        :param bool ships: Keep ship rows
+        :param bool planets: Keep planet rows
+        :param bool undocked: If set, only keep ships which are (True) or are not (False) undocked
+        :return: The selected rows, in row order
+        :rtype: list[int]
+        """
+        start = 0 if ships else self.num_ships
+        end = len(self.entities) if planets else self.num_ships
+        undocked_value = entity.Ship.DockingStatus.UNDOCKED.value
+        owners = self.owner
+        status = self.status
+        return [i for i in range(start, end)
+                if (owner is None or owners[i] == owner)
+                and (not_owner is None or owners[i] != not_owner)
+                and (undocked is None or i >= self.num_ships or (status[i] == undocked_value) == undocked)]
+
+    def dists(self, x, y, rows=None):
+        """
+        Center distances from a point to many rows at once.
+
+        :param float x: The x-coordinate of the point
+        :param float y: The y-coordinate of the point
+        :param list[int] rows: The rows to measure to, all rows if None
+        :return: The distance to each requested row
+        :rtype: array
+        """
+        xs = self.x
+        ys = self.y
+        sqrt = math.sqrt
+        if rows is None:
+            return array('d', [sqrt((ex - x)**2 + (ey - y)**2) for ex, ey in zip(xs, ys)])
+        return array('d', [sqrt((xs[i] - x)**2 + (ys[i] - y)**2) for i in rows])
+
+    def dist_matrix(self, rows_a, rows_b):
+        """
+        Pairwise center distances between two sets of rows.
+
+        :param list[int] rows_a: The rows of the matrix
+        :param list[int] rows_b: The columns of the matrix
+        :return: One array of distances to rows_b for every row in rows_a
+        :rtype: list[array]
+        """
+        return [self.dists(self.x[i], self.y[i], rows_b) for i in rows_a]
+
+    def within(self, x, y, r, rows=None):
+        """
+        :param float x: The x-coordinate of the point
+        :param float y: The y-coordinate of the point
+        :param float r: The maximum center distance
+        :param list[int] rows: The rows to search, all rows if None
+        :return: The rows within distance r of the point, in row order
+        :rtype: list[int]
+        """
+        rows = range(len(self.entities)) if rows is None else rows
+        return [i for i, d in zip(rows, self.dists(x, y, rows)) if d <= r]
+
+    def nearest(self, x, y, k=1, rows=None):
+        """
+        :param float x: The x-coordinate of the point
+        :param float y: The y-coordinate of the point
+        :param int k: The number of rows to return
+        :param list[int] rows: The rows to search, all rows if None
+        :return: The k rows closest to the point, closest first
+        :rtype: list[int]
+        """
+        rows = range(len(self.entities)) if rows is None else rows
+        ranked = sorted(zip(self.dists(x, y, rows), rows))
+        return [i for _, i in ranked[:k]]
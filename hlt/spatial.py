@@ -0,0 +1,154 @@
+import heapq
+import math
+from . import entity
+from .constants import MAX_SPEED, WEAPON_RADIUS
+
+
+def ships(owner=None, enemy_of=None, undocked=None):
+    """
+    Build a filter accepting the ships which match every given criterion.
+
+    :param game_map.Player owner: Only accept ships of this player
+    :param game_map.Player enemy_of: Only accept ships not owned by this player
+    :param bool undocked: If set, only accept ships which are (True) or are not (False) undocked
+    :return: The filter
+    :rtype: function
+    """
+    def accept(e):
+        return (type(e) == entity.Ship
+                and (owner is None or e.owner == owner)
+                and (enemy_of is None or e.owner != enemy_of)
+                and (undocked is None or e.can_atk() == undocked))
+    return accept
+
+
+def planets(owner=None, enemy_of=None):
+    """
+    Build a filter accepting the planets which match every given criterion.
+
+    :param game_map.Player owner: Only accept planets owned by this player
+    :param game_map.Player enemy_of: Only accept planets owned by another player
+    :return: The filter
+    :rtype: function
+    """
+    def accept(e):
+        return (type(e) == entity.Planet
+                and (owner is None or e.owner == owner)
+                and (enemy_of is None or (e.owner is not None and e.owner != enemy_of)))
+    return accept
+
+
+def _ring(qx, qy, ring):
+    # The cells at Chebyshev distance ring from (qx, qy)
+    if ring == 0:
+        yield qx, qy
+        return
+    for cx in range(qx - ring, qx + ring + 1):
+        yield cx, qy - ring
+        yield cx, qy + ring
+    for cy in range(qy - ring + 1, qy + ring):
+        yield qx - ring, cy
+        yield qx + ring, cy
+
+
+class SpatialIndex:
+    """
+    A uniform grid over the entity centers of one frame, answering radius and nearest-neighbour queries by
+    looking only at the cells a query can reach. Results come back in snapshot row order (ships in
+    Map.all_ships() order, then planets), so they match the equivalent list comprehensions over the map.
+    """
+
+    def __init__(self, snapshot, cell=WEAPON_RADIUS + MAX_SPEED):
+        """
+        :param snapshot.Snapshot snapshot: The frame to index
+        :param float cell: The side length of a grid cell
+        """
+        self.snapshot = snapshot
+        self.cell = cell
+        self._cells = {}
+        for i, (x, y) in enumerate(zip(snapshot.x, snapshot.y)):
+            self._cells.setdefault((int(x // cell), int(y // cell)), []).append(i)
+        self._max_radius = max(snapshot.radius) if len(snapshot) else 0
+        if self._cells:
+            self._extent = (min(c[0] for c in self._cells), min(c[1] for c in self._cells),
+                            max(c[0] for c in self._cells), max(c[1] for c in self._cells))
+
+    def _rows_near(self, x, y, r):
+        if not self._cells:
+            return []
+        cell = self.cell
+        min_cx, min_cy, max_cx, max_cy = self._extent
+        rows = []
+        for cx in range(max(int((x - r) // cell), min_cx), min(int((x + r) // cell), max_cx) + 1):
+            for cy in range(max(int((y - r) // cell), min_cy), min(int((y + r) // cell), max_cy) + 1):
+                rows.extend(self._cells.get((cx, cy), ()))
+        rows.sort()
+        return rows
+
+    def within(self, point, r, filter=None, surface=False):
+        """
+        :param geom.Point point: The center of the query
+        :param float r: The maximum distance from the point
+        :param function filter: If given, only entities accepted by it are returned
+        :param bool surface: Measure to the surface of the entities instead of their centers
+        :return: The entities within distance r of the point
+        :rtype: list[entity.Entity]
+        """
+        snap = self.snapshot
+        xs, ys, radii, entities = snap.x, snap.y, snap.radius, snap.entities
+        x = point.x
+        y = point.y
+        found = []
+        for i in self._rows_near(x, y, r + self._max_radius if surface else r):
+            d = math.sqrt((xs[i] - x)**2 + (ys[i] - y)**2)
+            if surface:
+                d -= radii[i]
+            if d <= r and (filter is None or filter(entities[i])):
+                found.append(entities[i])
+        return found
+
+    def iter_nearest(self, point, filter=None):
+        """
+        Lazily walk the entities outward from a point.
+
+        :param geom.Point point: The center of the query
+        :param function filter: If given, only entities accepted by it are yielded
+        :return: A generator of (center distance, entity), closest first
+        :rtype: generator
+        """
+        if not self._cells:
+            return
+        snap = self.snapshot
+        xs, ys, entities = snap.x, snap.y, snap.entities
+        x = point.x
+        y = point.y
+        cell = self.cell
+        qx = int(x // cell)
+        qy = int(y // cell)
+        min_cx, min_cy, max_cx, max_cy = self._extent
+        max_ring = max(qx - min_cx, max_cx - qx, qy - min_cy, max_cy - qy)
+        heap = []
+        for ring in range(max_ring + 1):
+            for c in _ring(qx, qy, ring):
+                for i in self._cells.get(c, ()):
+                    if filter is None or filter(entities[i]):
+                        heapq.heappush(heap, (math.sqrt((xs[i] - x)**2 + (ys[i] - y)**2), i))
+            # Everything within ring*cell of the point lives in the rings scanned so far
+            while heap and (heap[0][0] <= ring*cell or ring == max_ring):
+                d, i = heapq.heappop(heap)
+                yield d, entities[i]
+
+    def nearest(self, point, k=1, filter=None):
+        """
+        :param geom.Point point: The center of the query
+        :param int k: The number of entities to return
+        :param function filter: If given, only entities accepted by it are returned
+        :return: The k entities closest to the point, closest first
+        :rtype: list[entity.Entity]
+        """
+        found = []
+        for _, e in self.iter_nearest(point, filter):
+            found.append(e)
+            if len(found) == k:
+                break
+        return found
@@ -0,0 +1,54 @@
+import logging
+import threading
+
+
+class Speculation:
+    """
+    Work run on a background thread while the bot waits for the engine's next frame. The work gets its own
+    fork of the map, so the real map can be updated underneath it, and it only runs freely while the main
+    thread is blocked reading; once the frame arrives, stop is set and long work should poll it and give up.
+
+    :ivar stop: Set when the next frame arrives
+    """
+
+    def __init__(self, fn, gmap, validate=None):
+        """
+        :param function fn: fn(gmap, stop), the work. Its return value is the speculative result.
+        :param game_map.Map gmap: The fork of the map to work on
+        :param function validate: validate(result, gmap), whether the result still holds for the real next
+            frame. Results are always accepted if None.
+        """
+        self._fn = fn
+        self._validate = validate
+        self._result = None
+        self._done = threading.Event()
+        self.stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(gmap,), daemon=True)
+        self._thread.start()
+
+    def _run(self, gmap):
+        try:
+            self._result = self._fn(gmap, self.stop)
+        except Exception:
+            logging.exception("Speculation failed")
+        finally:
+            self._done.set()
+
+    def done(self):
+        """
+        :return: True if the work has finished
+        :rtype: bool
+        """
+        return self._done.is_set()
+
+    def result(self, gmap, wait=0):
+        """
+        :param game_map.Map gmap: The real frame the result should hold for
+        :param float wait: Seconds to wait for unfinished work
+        :return: The result, or None if the work did not finish in time, was stopped, or does not validate
+        """
+        if not self._done.wait(wait) or self._result is None:
+            return None
+        if self._validate is not None and not self._validate(self._result, gmap):
+            return None
+        return self._result
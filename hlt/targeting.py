@@ -0,0 +1,73 @@
+import heapq
+
+
+class MoveQueue:
+    """
+    Yields (ship, target, cost) for every ship and target in the same order as sorting all the pairs by cost,
+    with ties kept in ship order and then target order, but without scoring or sorting all the pairs.
+
+    Each ship keeps a small heap of scored candidates. Targets which are cheap to enumerate (planets) are
+    scored up front; the many others (enemy ships) are pulled nearest-first from the spatial index only while
+    a candidate that far away could still beat the ship's best scored one. A global heap merges the heads of
+    the ships' streams, and a ship's next candidate is only scored once its current one has been consumed
+    without the ship leaving the pending set.
+    """
+
+    def __init__(self, ships, targets, cost, index=None, lazy=(), lower_bound=None, pending=None):
+        """
+        :param list[entity.Ship] ships: The ships to find targets for
+        :param list[entity.Entity] targets: All targets, in tie-break order
+        :param function cost: cost(ship, target), the lower the better
+        :param spatial.SpatialIndex index: The index to pull the lazy targets from
+        :param lazy: The targets to pull from the index instead of scoring up front
+        :param function lower_bound: The lowest cost a lazy target at a given center distance can have
+        :param set pending: Ships still wanting a target. Once a ship leaves it, its remaining candidates are
+            skipped. If None, every pair is yielded.
+        """
+        self._cost = cost
+        self._index = index
+        self._lower_bound = lower_bound
+        self._pending = pending
+        self._order = {t: i for i, t in enumerate(targets)}
+        self._lazy = set(lazy)
+        self._eager = [t for t in targets if t not in self._lazy]
+        self._streams = {}
+        self._heap = []
+        #: The cheapest (cost, target) of every ship that has any target
+        self.first = {}
+
+        for i, s in enumerate(ships):
+            stream = self._streams[s] = self._stream(s)
+            head = next(stream, None)
+            if head is not None:
+                cost, j, t = head
+                self.first[s] = (cost, t)
+                self._heap.append((cost, i, j, s, t))
+        heapq.heapify(self._heap)
+
+    def _stream(self, s):
+        # A ship's candidates as (cost, target order, target), cheapest first
+        local = [(self._cost(s, t), self._order[t], t) for t in self._eager]
+        heapq.heapify(local)
+        nearest = iter(())
+        if self._lazy:
+            nearest = self._index.iter_nearest(s.loc, lambda e: e in self._lazy)
+        ahead = next(nearest, None)
+
+        while local or ahead is not None:
+            # Pull until nothing left in the index could tie or beat the best scored candidate
+            while ahead is not None and (not local or self._lower_bound(ahead[0]) <= local[0][0]):
+                t = ahead[1]
+                heapq.heappush(local, (self._cost(s, t), self._order[t], t))
+                ahead = next(nearest, None)
+            yield heapq.heappop(local)
+
+    def __iter__(self):
+        heap = self._heap
+        while heap:
+            cost, i, j, s, t = heapq.heappop(heap)
+            yield s, t, cost
+            if self._pending is None or s in self._pending:
+                head = next(self._streams[s], None)
+                if head is not None:
+                    heapq.heappush(heap, (head[0], i, head[1], s, head[2]))
@@ -0,0 +1,112 @@
+import socket
+import sys
+from collections import deque
+
+
+class Transport:
+    """
+    Carries the engine's lines to the bot and the bot's lines back. Lines come in as raw bytes, which the map
+    parser tokenizes directly, and every line goes out in a single write.
+    """
+
+    def read_line(self):
+        """
+        :return: The next line from the engine, without its newline
+        :rtype: bytes
+        """
+        raise NotImplementedError
+
+    def write_line(self, line):
+        """
+        Send one line to the engine and flush it.
+
+        :param str line: The line, without its newline
+        :return: nothing
+        """
+        raise NotImplementedError
+
+
+class PipeTransport(Transport):
+    """
+    Talks to the engine over binary file objects, the process' stdin and stdout by default.
+    """
+
+    def __init__(self, infile=None, outfile=None):
+        """
+        :param infile: The binary file to read from, sys.stdin.buffer if None
+        :param outfile: The binary file to write to, sys.stdout.buffer if None
+        """
+        self._in = sys.stdin.buffer if infile is None else infile
+        self._out = sys.stdout.buffer if outfile is None else outfile
+
+    def read_line(self):
+        return self._in.readline().rstrip(b'\n')
+
+    def write_line(self, line):
+        self._out.write(line.encode() + b'\n')
+        self._out.flush()
+
+
+class SocketTransport(PipeTransport):
+    """
+    Talks to an engine listening on a TCP socket.
+    """
+
+    def __init__(self, sock):
+        """
+        :param socket.socket sock: A connected socket
+        """
+        self._sock = sock
+        stream = sock.makefile('rwb')
+        super().__init__(stream, stream)
+
+    @classmethod
+    def connect(cls, host, port):
+        """
+        :param str host: The engine's host
+        :param int port: The engine's port
+        :return: A transport over a new connection
+        :rtype: SocketTransport
+        """
+        return cls(socket.create_connection((host, port)))
+
+    def close(self):
+        self._in.close()
+        self._sock.close()
+
+
+class LocalTransport(Transport):
+    """
+    An in-process stand-in for the engine, for tests and offline runs. It serves queued lines and records
+    everything the bot sends.
+
+    :ivar sent: The lines the bot sent, in order
+    """
+
+    def __init__(self, lines=(), engine=None):
+        """
+        :param lines: The lines to serve first, as bytes or str
+        :param function engine: If given, engine(line) is called with every line the bot sends and returns
+            the lines to serve next
+        """
+        self._lines = deque()
+        self._engine = engine
+        self.sent = []
+        self.feed(lines)
+
+    def feed(self, lines):
+        """
+        Queue more lines for the bot to read.
+
+        :param lines: The lines, as bytes or str
+        :return: nothing
+        """
+        self._lines.extend(line.encode() if isinstance(line, str) else line for line in lines)
+
+    def read_line(self):
+        return self._lines.popleft() if self._lines else b''
+
+    def write_line(self, line):
+        self.sent.append(line)
+        if self._engine is not None:
+            self.feed(self._engine(line))
@@ -0,0 +1,55 @@
+import random
+
+# Builds turn strings in the Halite II engine format so tests and benchmarks
+# can replay large late-game frames without a running engine.
+
+
+def random_frame(seed, num_players=4, ships_per_player=150, num_planets=24,
+                 width=384, height=256):
+    rng = random.Random(seed)
+
+    planets = []
+    for plid in range(num_planets):
+        r = round(3 + rng.random()*9, 4)
+        x = round(r + 10 + rng.random()*(width - 2*r - 20), 4)
+        y = round(r + 10 + rng.random()*(height - 2*r - 20), 4)
+        spots = 2 + int(rng.random()*4)
+        owner = int(rng.random()*(num_players + 1)) - 1
+        planets.append([plid, x, y, r, spots, owner, []])
+
+    sid = 0
+    players = []
+    for pid in range(num_players):
+        ships = []
+        for _ in range(ships_per_player):
+            owned = [p for p in planets if p[5] == pid and len(p[6]) < p[4]]
+            if owned and rng.random() < .2:
+                p = owned[0]
+                x = round(p[1] + (p[3] + 1)*rng.random()*2 - p[3] - 1, 4)
+                y = round(p[2] + (p[3] + 1)*rng.random()*2 - p[3] - 1, 4)
+                status = 1 + int(rng.random()*3)
+                p[6].append(sid)
+                ships.append((sid, x, y, 1 + int(rng.random()*255), status, p[0]))
+            else:
+                x = round(rng.random()*width, 4)
+                y = round(rng.random()*height, 4)
+                ships.append((sid, x, y, 1 + int(rng.random()*255), 0, 0))
+            sid += 1
+        players.append((pid, ships))
+
+    tokens = [str(num_players)]
+    for pid, ships in players:
+        tokens += [str(pid), str(len(ships))]
+        for (ship_id, x, y, hp, status, plid) in ships:
+            tokens += [str(ship_id), str(x), str(y), str(hp), "0.0", "0.0",
+                       str(status), str(plid), "0", "0"]
+
+    tokens.append(str(num_planets))
+    for (plid, x, y, r, spots, owner, docked) in planets:
+        owned = 1 if docked else 0
+        tokens += [str(plid), str(x), str(y), "2000", str(r), str(spots),
+                   "0", "1500", str(owned), str(owner if docked else 0),
+                   str(len(docked))]
+        tokens += [str(ship_id) for ship_id in docked]
+
+    return " ".join(tokens)
@@ -0,0 +1,98 @@
+import unittest
+import itertools
+import random
+import time
+from ..game_map import Map
+from ..entity import Planet
+from ..assignment import Auction, capacity
+from ..constants import WEAPON_RADIUS
+from .. import helper
+from .frames import random_frame
+
+
+def total(assignment, cost, idle_cost):
+    return sum(idle_cost if t is None else cost(s, t) for s, t in assignment.items())
+
+
+def greedy(ships, targets, cost, idle_cost, capacity=capacity):
+    """
+    The walk MyBot does: take the pairs cheapest first while the ship is free and the target has room.
+    """
+    left = {t: capacity(t) for t in targets}
+    pairs = sorted(((cost(s, t), i, j) for i, s in enumerate(ships) for j, t in enumerate(targets)))
+    assignment = {s: None for s in ships}
+    for c, i, j in pairs:
+        s, t = ships[i], targets[j]
+        if c < idle_cost and assignment[s] is None and left[t] > 0:
+            assignment[s] = t
+            left[t] -= 1
+    return assignment
+
+
+class Test_Auction(unittest.TestCase):
+    def setUp(self):
+        self.map = Map(0, 384, 256)
+        self.map._parse(random_frame(5, ships_per_player=50))
+        self.targets = [p for p in self.map.unowned_planets() + self.map.my_uplanets()] + list(self.map.en_ships())
+
+    def cost(self, s, e):
+        if type(e) == Planet:
+            return helper.to_turns(s.dist_to(s.closest_pt_to(e))) + 2.5
+        d = helper.to_turns(s.dist_to(e) - WEAPON_RADIUS)
+        return d - 1 if not e.can_atk() else d
+
+    def test_brute_force(self):
+        rng = random.Random(3)
+        for _ in range(30):
+            ships = list(range(5))
+            targets = list(range(5, 8))
+            caps = {t: rng.randint(0, 2) for t in targets}
+            table = {(s, t): round(rng.random()*10, 2) for s in ships for t in targets}
+            cost = lambda s, t: table[(s, t)]
+            auction = Auction(epsilon=.001)
+            result = auction.solve(ships, targets, cost, 6, caps.get)
+            for t in targets:
+                self.assertTrue(list(result.values()).count(t) <= caps[t])
+            best = min(total(dict(zip(ships, choice)), cost, 6)
+                       for choice in itertools.product(targets + [None], repeat=len(ships))
+                       if all(choice.count(t) <= caps[t] for t in targets))
+            self.assertTrue(total(result, cost, 6) <= best + len(ships)*auction.epsilon)
+
+    def test_warm_start(self):
+        ships = self.map.my_uships()
+        auction = Auction()
+        cold = auction.solve(ships, self.targets, self.cost, 40)
+        cold_bids = auction.bids
+        warm = auction.solve(ships, self.targets, self.cost, 40)
+        self.assertTrue(auction.bids < cold_bids)
+        self.assertTrue(abs(total(warm, self.cost, 40) - total(cold, self.cost, 40)) <= len(ships)*auction.epsilon)
+
+    def test_versus_greedy(self):
+        ships = self.map.my_uships()
+        auction = Auction()
+        optimal = total(auction.solve(ships, self.targets, self.cost, 40), self.cost, 40)
+        self.assertTrue(optimal <= total(greedy(ships, self.targets, self.cost, 40), self.cost, 40))
+
+    def test_assignment_time(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(random_frame(7, num_players=4, ships_per_player=200))
+        ships = gmap.my_uships()
+        targets = list(gmap.unowned_planets() + gmap.my_uplanets()) + list(gmap.en_ships())
+        index = gmap.spatial()
+        candidates = {s: [p for p in targets if type(p) == Planet] + index.nearest(s.loc, 16, lambda e: e in gmap.en_ships())
+                      for s in ships}
+
+        start_time = time.process_time()
+        assignment = greedy(ships, targets, self.cost, 40)
+        end_time = time.process_time()
+        print(str(end_time - start_time), total(assignment, self.cost, 40))
+
+        auction = Auction()
+        for _ in range(2):
+            start_time = time.process_time()
+            assignment = auction.solve(ships, targets, self.cost, 40, candidates=candidates)
+            end_time = time.process_time()
+            print(str(end_time - start_time), total(assignment, self.cost, 40), auction.bids)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from ..budget import Budget
+
+class Test_Budget(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.budget = Budget(2.0, clock=lambda: self.now)
+
+    def test_phases(self):
+        self.budget.phase('parse')
+        self.now = .5
+        self.budget.phase('moves', reserve=.5)
+        self.assertTrue(self.budget.phase_remaining() == 1.0)
+        self.now = 1.6
+        self.assertTrue(self.budget.phase_expired())
+        self.assertFalse(self.budget.expired())
+        self.budget.phase('fallback')
+        self.assertTrue(abs(self.budget.phase_remaining() - .4) < 1e-9)
+        self.now = 2.1
+        self.assertTrue(self.budget.expired())
+        self.budget.close()
+        self.assertTrue(self.budget.spent['parse'] == .5)
+        self.assertTrue(abs(self.budget.spent['moves'] - 1.1) < 1e-9)
+        self.assertTrue(abs(self.budget.spent['fallback'] - .5) < 1e-9)
+
+    def test_share(self):
+        self.budget.phase('threats', share=.25)
+        self.assertTrue(self.budget.phase_remaining() == .5)
+
+    def test_degrade(self):
+        self.budget.phase('moves')
+        self.assertTrue(self.budget.degrade(90, 10) == 90)
+        self.now = 1.5
+        self.assertTrue(self.budget.degrade(90, 10) == 50)
+        self.now = 2.5
+        self.assertTrue(self.budget.degrade(90, 10) == 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from .. import collision
+from ..entity import Position
+from ..geom import Point, Seg, ps_dist_xy, min_dist_xy
+import random
+import time
+
+class Test_Collision(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(24)
+        self.circles = [(self.rng.uniform(0, 100), self.rng.uniform(0, 100), self.rng.uniform(.5, 8)) for _ in range(40)]
+        self.segments = [(self.rng.uniform(0, 100), self.rng.uniform(0, 100), self.rng.uniform(0, 100), self.rng.uniform(0, 100))
+                         for _ in range(200)]
+
+    def test_intersect_segment_circle(self):
+        circle = Position(Point(5, 0), 1)
+        self.assertTrue(collision.intersect_segment_circle(Point(0, 1.4), Point(10, 1.4), circle))
+        self.assertFalse(collision.intersect_segment_circle(Point(0, 1.6), Point(10, 1.6), circle))
+        self.assertFalse(collision.intersect_segment_circle(Position(Point(0, 1.4)), Position(Point(3, 1.4)), circle))
+        # A start already inside the circle intersects, whichever way the segment points
+        self.assertTrue(collision.intersect_segment_circle(Point(5, .5), Point(0, 3), circle, fudge=0))
+        self.assertTrue(collision.intersect_segment_circle(Point(5, .5), Point(5, .5), circle, fudge=0))
+
+    def test_closest_approach(self):
+        # Head on along the x axis, meeting halfway through the turn
+        t, d = collision.closest_approach(Seg(Point(0, 0), Point(10, 0)), Seg(Point(10, 1), Point(0, 1)))
+        self.assertTrue(t == .5 and d == 1)
+        # Moving apart, closest at the start
+        t, d = collision.closest_approach(Seg(Point(0, 0), Point(-1, 0)), Seg(Point(3, 4), Point(4, 4)))
+        self.assertTrue(t == 0 and d == 5)
+        # Same velocity, the distance never changes
+        t, d = collision.closest_approach(Seg(Point(0, 0), Point(1, 1)), Seg(Point(0, 2), Point(1, 3)))
+        self.assertTrue(t == 0 and d == 2)
+        for a in self.segments[:50]:
+            for b in self.segments[50:100]:
+                t, d = collision.closest_approach_xy(*a, *b)
+                self.assertTrue(0 <= t <= 1)
+                self.assertTrue(abs(d - min_dist_xy(*a, *b)) < .000001)
+        self.assertTrue(collision.moving_circles_collide(Seg(Point(0, 0), Point(10, 0)), .5,
+                                                         Seg(Point(10, 1), Point(0, 1)), .5))
+        self.assertFalse(collision.moving_circles_collide(Seg(Point(0, 0), Point(10, 0)), .5,
+                                                          Seg(Point(10, 1.1), Point(0, 1.1)), .5))
+
+    def test_batched(self):
+        hits = collision.segments_circles(self.segments, self.circles)
+        for (x1, y1, x2, y2), k in zip(self.segments, hits):
+            near = [i for i, (x, y, r) in enumerate(self.circles) if ps_dist_xy(x, y, x1, y1, x2, y2) <= r]
+            self.assertTrue(k == (near[0] if near else -1))
+            self.assertTrue(collision.segment_circles(x1, y1, x2, y2, self.circles) == k)
+        self.assertTrue(-1 in hits and any(k >= 0 for k in hits))
+
+        paths = [(x, y, x + self.rng.uniform(-7, 7), y + self.rng.uniform(-7, 7), r) for x, y, r in self.circles]
+        for x1, y1, x2, y2 in self.segments:
+            near = [i for i, p in enumerate(paths) if min_dist_xy(x1, y1, x2, y2, *p[:4]) <= p[4]]
+            self.assertTrue(collision.path_circles(x1, y1, x2, y2, paths) == (near[0] if near else -1))
+        self.assertTrue(collision.segment_circles(0, 0, 1, 1, []) == -1)
+
+    def test_pursuit(self):
+        # The chaser closes the gap to the end of the move
+        self.assertTrue(collision.pursuit_circles(0, 0, 7, 0, [(15, 0, 1.1)], 7) == 0)
+        self.assertTrue(collision.pursuit_circles(0, 0, 7, 0, [(15, 0, 1.1)], 0) == -1)
+        self.assertTrue(collision.pursuit_circles(0, 0, 7, 0, [(50, 50, 1.1), (15, 0, 1.1)], 7) == 1)
+
+    def test_batched_time(self):
+        start_time = time.process_time()
+        for _ in range(10):
+            collision.segments_circles(self.segments, self.circles)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+        start_time = time.process_time()
+        for _ in range(10):
+            [[ps_dist_xy(x, y, *s) <= r for x, y, r in self.circles] for s in self.segments]
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+
+if __name__ == '__main__':
+    unittest.main()
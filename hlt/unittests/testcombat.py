@@ -0,0 +1,61 @@
+import unittest
+import time
+from ..game_map import Map
+from ..combat import Volley
+from ..constants import WEAPON_DAMAGE, WEAPON_RADIUS
+from .frames import random_frame
+
+
+def naive(gmap):
+    """
+    Every undocked ship against every ship, with all the damage landing at once.
+    """
+    hp = {s: s.hp for s in gmap.all_ships()}
+    fired = []
+    for s in gmap.all_uships():
+        atks = [t for t in gmap.all_ships() if s.owner != t.owner and s.dist_to(t) < WEAPON_RADIUS]
+        if atks:
+            fired.append(s)
+            for t in atks:
+                hp[t] -= WEAPON_DAMAGE/len(atks)
+    return hp, fired
+
+
+class Test_Volley(unittest.TestCase):
+    def test_split(self):
+        gmap = Map(0, 100, 100)
+        # One ship of player 0 in reach of two ships of player 1, which are out of reach of each other
+        gmap._parse("2 0 1 0 50.0 50.0 255 0.0 0.0 0 0 0 0 1 2 1 45.0 50.0 100 0.0 0.0 0 0 0 0 "
+                    "2 56.0 50.0 30 0.0 0.0 0 0 0 0 0")
+        volley = Volley(gmap.snapshot())
+        hp = {s.id: h for s, h in volley.damaged_ships()}
+        self.assertEqual(hp, {0: 255 - 2*WEAPON_DAMAGE, 1: 100 - WEAPON_DAMAGE/2, 2: 30 - WEAPON_DAMAGE/2})
+        self.assertEqual([s.id for s in volley.fired_ships()], [0, 1, 2])
+        self.assertEqual([s.id for s in volley.dead_ships()], [2])
+
+    def test_naive(self):
+        for seed in range(4):
+            gmap = Map(0, 96, 64)
+            gmap._parse(random_frame(seed, ships_per_player=40, num_planets=6, width=96, height=64))
+            volley = Volley(gmap.snapshot())
+            hp, fired = naive(gmap)
+            self.assertEqual(volley.fired_ships(), fired)
+            for s, h in zip(gmap.all_ships(), volley.hp):
+                self.assertAlmostEqual(h, hp[s])
+            self.assertEqual(volley.dead_ships(), [s for s in gmap.all_ships() if hp[s] <= 0])
+
+    def test_volley_time(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(random_frame(1))
+        snap = gmap.snapshot()
+        start_time = time.process_time()
+        Volley(snap)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+        start_time = time.process_time()
+        naive(gmap)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+
+if __name__ == '__main__':
+    unittest.main()
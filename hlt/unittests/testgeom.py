@@ -1,7 +1,9 @@
 import unittest
 from .. import geom
-from ..geom import Point, Seg, ps_dist, min_dist
+from ..geom import Point, Seg, ps_dist, min_dist, ps_dist_xy, min_dist_xy, polar_xy, POLAR
 import math
+import random
+import time
 
 class Test_Geom(unittest.TestCase):
     def setUp(self):
@@ -42,5 +44,120 @@ class Test_Geom(unittest.TestCase):
         self.assertTrue(min_dist(seg3,seg4) == math.sqrt(2)/2)
         self.assertTrue(min_dist(seg5,seg6) == 0)
 
+    def test_xy(self):
+        rng = random.Random(8)
+        for _ in range(1000):
+            p, a, b, c, d = [Point(rng.random()*10, rng.random()*10) for _ in range(5)]
+            self.assertTrue(ps_dist(p, Seg(a,b)) == ps_dist_xy(p.x, p.y, a.x, a.y, b.x, b.y))
+            self.assertTrue(min_dist(Seg(a,b), Seg(c,d)) == min_dist_xy(a.x, a.y, b.x, b.y, c.x, c.y, d.x, d.y))
+        self.assertTrue(self.z != None)
+        with self.assertRaises(AttributeError):
+            self.z.r = 1
+
+    def test_polar(self):
+        for ang in range(360):
+            for r in range(len(POLAR)):
+                self.assertTrue(POLAR[r][ang] == (r*math.cos(math.radians(ang)), r*math.sin(math.radians(ang))))
+            p = Point.polar(2.5, ang)
+            self.assertTrue((p.x, p.y) == (2.5*math.cos(math.radians(ang)), 2.5*math.sin(math.radians(ang))))
+        self.assertTrue(polar_xy(3, 400) == (3*math.cos(math.radians(400)), 3*math.sin(math.radians(400))))
+        self.assertTrue(polar_xy(3, 12.5) == (3*math.cos(math.radians(12.5)), 3*math.sin(math.radians(12.5))))
+
+# The allocating Point, Seg, ps_dist, min_dist and Point.polar as they were before the raw-coordinate
+# versions, kept as the benchmark baseline
+class _OldPoint:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    @classmethod
+    def polar(cls, r, ang):
+        x = r*math.cos(math.radians(ang))
+        y = r*math.sin(math.radians(ang))
+        return cls(x,y)
+
+    def __add__(self,p2):
+        return _OldPoint(self.x + p2.x, self.y + p2.y)
+
+    def __sub__(self,p2):
+        return _OldPoint(self.x - p2.x, self.y - p2.y)
+
+    def norm2(self):
+        return self.x**2 + self.y**2
+
+class _OldSeg:
+    def __init__(self,p1,p2):
+        self.p1 = p1
+        self.p2 = p2
+
+    def d_vect(self):
+        return self.p2 - self.p1
+
+    def along_line(self,t):
+        return _OldPoint((1-t)*self.p1.x+t*self.p2.x, (1-t)*self.p1.y+t*self.p2.y)
+
+def _old_ps_dist(p, seg):
+    v1 = p - seg.p1
+    v2 = seg.d_vect()
+    d = v2.norm2()
+
+    if d==0:
+        return geom.pp_dist(p,seg.p1)
+    else:
+        t = geom.dot(v1,v2)/d
+        if t<0:
+            t = 0
+        elif t>1:
+            t = 1
+        return geom.pp_dist(p, seg.along_line(t))
+
+def _old_min_dist(seg1,seg2):
+    start = seg2.p1 - seg1.p1
+    delta = seg2.d_vect() - seg1.d_vect()
+    seg_eff = _OldSeg(start, start + delta)
+    return _old_ps_dist(_OldPoint(0,0), seg_eff)
+
+class Test_GeomBench(unittest.TestCase):
+    # Per-call times of the old allocating versions, the object versions and the raw-coordinate versions of
+    # the hot geometry functions
+    N = 20000
+
+    def setUp(self):
+        self.p = Point(1.5, 2.5)
+        self.a = Seg(Point(0,0), Point(3,4))
+        self.b = Seg(Point(1,5), Point(-2,1))
+        self.old_p = _OldPoint(1.5, 2.5)
+        self.old_a = _OldSeg(_OldPoint(0,0), _OldPoint(3,4))
+        self.old_b = _OldSeg(_OldPoint(1,5), _OldPoint(-2,1))
+
+    def bench(self, name, f):
+        start_time = time.process_time()
+        for _ in range(self.N):
+            f()
+        end_time = time.process_time()
+        print("{}: {:.3f} us".format(name, (end_time - start_time)/self.N*1e6))
+
+    def test_ps_dist(self):
+        p, a = self.p, self.a
+        old_p, old_a = self.old_p, self.old_a
+        self.assertTrue(_old_ps_dist(old_p, old_a) == ps_dist(p, a))
+        self.bench("old ps_dist", lambda: _old_ps_dist(old_p, old_a))
+        self.bench("ps_dist", lambda: ps_dist(p, a))
+        self.bench("ps_dist_xy", lambda: ps_dist_xy(1.5, 2.5, 0, 0, 3, 4))
+
+    def test_min_dist(self):
+        a, b = self.a, self.b
+        old_a, old_b = self.old_a, self.old_b
+        self.assertTrue(_old_min_dist(old_a, old_b) == min_dist(a, b))
+        self.bench("old min_dist", lambda: _old_min_dist(old_a, old_b))
+        self.bench("min_dist", lambda: min_dist(a, b))
+        self.bench("min_dist_xy", lambda: min_dist_xy(0, 0, 3, 4, 1, 5, -2, 1))
+
+    def test_point(self):
+        p = self.p
+        self.bench("Point.__add__", lambda: p + p)
+        self.bench("old Point.polar", lambda: _OldPoint.polar(7, 45))
+        self.bench("Point.polar", lambda: Point.polar(7, 45))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
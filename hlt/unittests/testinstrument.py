@@ -0,0 +1,59 @@
+import unittest
+import io
+import json
+from ..game_map import Map
+from ..budget import Budget
+from .. import helper, instrument
+from .frames import random_frame
+
+
+class Test_Recorder(unittest.TestCase):
+    def tearDown(self):
+        instrument.activate(None)
+
+    def test_record(self):
+        clock = iter(range(100)).__next__
+        out = io.StringIO()
+        recorder = instrument.Recorder(out, clock=clock)
+        recorder.begin_turn(3)
+        with recorder.timer('parse'):
+            pass
+        with recorder.timer('parse'):
+            pass
+        recorder.count('nav.calls')
+        recorder.count('nav.calls', 2)
+        record = recorder.end_turn()
+        self.assertEqual(record, {'turn': 3, 'time': 5, 'timers': {'parse': 2}, 'counters': {'nav.calls': 3}})
+        self.assertEqual(json.loads(out.getvalue()), record)
+
+    def test_hooks(self):
+        gmap = Map(0, 384, 256)
+        recorder = instrument.Recorder(profile=5)
+        instrument.activate(recorder)
+        recorder.begin_turn(0)
+        budget = Budget()
+        budget.phase('parse')
+        gmap._parse(random_frame(1, ships_per_player=20))
+        budget.phase('moves')
+        ships = gmap.my_uships()
+        for s in ships:
+            helper.nav(s, gmap.all_planets()[0], gmap, None)
+        budget.close()
+        record = recorder.end_turn()
+
+        self.assertEqual(recorder.records, [record])
+        self.assertEqual(set(record['timers']), {'link', 'nav', 'phase.parse', 'phase.moves'})
+        self.assertEqual(record['counters']['nav.calls'], len(ships))
+        self.assertTrue(record['counters']['nav.angles'] >= len(ships))
+        self.assertTrue('nav.obstacles' in record['counters'])
+        self.assertEqual(len(record['profile']), 5)
+
+    def test_off(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(random_frame(1, ships_per_player=20))
+        with instrument.timer('parse'):
+            helper.nav(gmap.my_uships()[0], gmap.all_planets()[0], gmap, None)
+        self.assertTrue(instrument.active() is None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from ..game_map import Map
+from ..networking import _queued
+from .frames import random_frame
+
+
+class Formatted:
+    """
+    Remembers the thread which turned it into a string.
+    """
+    def __init__(self):
+        self.thread = None
+
+    def __str__(self):
+        self.thread = threading.current_thread()
+        return "formatted"
+
+
+def logger(handler):
+    log = logging.getLogger("hlt.unittests.testlogging.{}".format(id(handler)))
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    log.addHandler(handler)
+    return log
+
+
+class Test_Logging(unittest.TestCase):
+    def test_deferred(self):
+        out = io.StringIO()
+        handler, listener = _queued(logging.StreamHandler(out))
+        log = logger(handler)
+
+        # Plain numbers and strings are formatted by the writer, anything else right away
+        arg = Formatted()
+        log.info("%s at %d", "turn", 3)
+        log.info("%s", arg)
+        self.assertTrue(arg.thread is threading.current_thread())
+        listener.stop()
+        self.assertEqual(out.getvalue(), "turn at 3\nformatted\n")
+
+    def time_mode(self, mode, emit):
+        # Time emit(log) under a logging mode, counting every thread's CPU (as Budget does) and, for the
+        # queued mode, the writer draining the queue
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = logging.FileHandler(os.path.join(tmp, "bench.log"), mode='w')
+            writer.setFormatter(logging.Formatter('%(message)s'))
+            handler = writer
+            listener = None
+            if mode == 'queued':
+                handler, listener = _queued(writer)
+            log = logger(handler)
+            if mode == 'disabled':
+                log.setLevel(logging.CRITICAL)
+            start_time = time.process_time()
+            records = emit(log)
+            if listener is not None:
+                listener.stop()
+            end_time = time.process_time()
+            log.removeHandler(handler)
+            writer.close()
+        return (end_time - start_time)/records
+
+    def test_logging_time(self):
+        def emit(log):
+            for turn in range(20000):
+                log.info("Time Elapsed: %s", turn*.001)
+            return 20000
+        for mode in ('direct', 'queued', 'disabled'):
+            print(mode, str(self.time_mode(mode, emit)))
+
+    def test_game_logging_time(self):
+        # MyBot's per-turn log calls on a large 4-player frame, with every one of our ships logging a defense
+        gmap = Map(0, 384, 256)
+        gmap._parse(random_frame(19, num_players=4, ships_per_player=150))
+        ships = gmap.my_uships()
+        enemies = gmap.en_ships()
+
+        def emit(log):
+            records = 0
+            for turn in range(50):
+                log.info("TURN %d", turn)
+                log.info("HALFWAY TIME: %s", turn*.001)
+                for s, e in zip(ships, enemies):
+                    log.info("%s defend %s", s, e)
+                log.info("Time Elapsed: %s", turn*.001)
+                records += 3 + min(len(ships), len(enemies))
+            return records
+        for mode in ('direct', 'queued', 'disabled'):
+            print(mode, str(self.time_mode(mode, emit)))
+
+if __name__ == '__main__':
+    unittest.main()
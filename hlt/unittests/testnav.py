@@ -0,0 +1,104 @@
+import unittest
+import json
+import math
+import os
+import time
+from ..game_map import Map
+from ..entity import Position
+from ..geom import Point
+from .. import helper, spatial
+from .frames import random_frame
+
+# Frames replayed by the regression corpus: (seed, players, ships per player, planets, width, height)
+CORPUS_FRAMES = [(seed, 4 - 2*(seed % 2), 12 + 6*(seed % 4), 6 + seed % 5, 120 + 24*(seed % 3), 80 + 16*(seed % 3))
+                 for seed in range(12)]
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'nav_corpus.json')
+
+
+def replay(seed, num_players, ships_per_player, num_planets, width, height, analytic=False):
+    """
+    Route every one of our undocked ships in turn, the way MyBot does, and return what nav and harass_nav
+    decided for each of them.
+    """
+    gmap = Map(0, width, height)
+    gmap._parse(random_frame(seed, num_players, ships_per_player, num_planets, width, height))
+    me = gmap.get_me()
+    move_table = {}
+    results = []
+    for k, s in enumerate(gmap.my_uships()):
+        planets = gmap.all_planets()
+        if k % 4 == 0:
+            cmd, move = helper.nav(s, s.closest_pt_to(planets[k % len(planets)]), gmap, None, move_table, analytic=analytic)
+        elif k % 4 == 1:
+            targ = gmap.nearest(s.loc, 1, spatial.ships(enemy_of=me))[0]
+            cmd, move = helper.nav(s, targ, gmap, None, move_table, analytic=analytic)
+        elif k % 4 == 2:
+            cmd, move = helper.nav(s, Position(s.loc + Point.polar(20, k*37 % 360)), gmap, None, move_table, analytic=analytic)
+        else:
+            targ = gmap.nearest(s.loc, 1, spatial.ships(enemy_of=me))[0]
+            chasers = gmap.within(s.loc, 2*7+8, spatial.ships(enemy_of=me, undocked=True))
+            cmd, move = helper.harass_nav(s, targ, gmap, None, move_table, enemies=chasers, analytic=analytic)
+        if move:
+            move_table[s] = move
+        results.append([cmd, None if move is None else [move.p2.x, move.p2.y]])
+    return results
+
+
+def record_corpus():
+    """
+    Re-record the expected nav decisions, e.g. python -c "from hlt.unittests import testnav; testnav.record_corpus()"
+    """
+    with open(CORPUS_PATH, 'w') as f:
+        json.dump([replay(*frame) for frame in CORPUS_FRAMES], f)
+
+
+class Test_Nav(unittest.TestCase):
+    def test_corpus(self):
+        with open(CORPUS_PATH) as f:
+            expected = json.load(f)
+        for frame, results in zip(CORPUS_FRAMES, expected):
+            self.assertEqual(replay(*frame), results)
+
+    def test_analytic_corpus(self):
+        with open(CORPUS_PATH) as f:
+            expected = json.load(f)
+        for frame, results in zip(CORPUS_FRAMES, expected):
+            self.assertEqual(replay(*frame, analytic=True), results)
+
+    def test_free_deviations(self):
+        gmap = Map(0, 100, 100)
+        gmap._parse("1 0 1 0 50.0 50.0 255 0.0 0.0 0 0 0 0 1 0 60.0 50.0 2000 5.0 3 0 1500 0 0 0")
+        ship = gmap.get_me().get_ship(0)
+        rows = helper._obstacle_rows(ship, gmap.all_planets(), {})
+        devs = list(helper._free_deviations(ship, rows, 0, 90, 7, 20))
+        blocked = [d for d in helper._deviations(90) if d not in devs]
+        # Headings within asin(5.500001/10) of the planet's center are blocked
+        self.assertEqual(blocked, [d for d in helper._deviations(90) if abs(d) <= 33])
+        self.assertEqual(devs[:4], [34, -34, 35, -35])
+
+    def test_broad_phase(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(random_frame(1, ships_per_player=60))
+        pruned = 0
+        for s in gmap.my_uships():
+            targ = gmap.all_planets()[s.id % 24]
+            obs = helper._obstacles(s, gmap, s.dist_to(targ))
+            rows = helper._obstacle_rows(s, obs, {})
+            kept = helper._obstacle_rows(s, obs, {}, speed=7, full=s.dist_to(targ))
+            self.assertTrue(set(kept) <= set(rows))
+            for row in set(rows) - set(kept):
+                self.assertTrue(math.sqrt((row[1] - s.loc.x)**2 + (row[2] - s.loc.y)**2) - row[3] >
+                                (7 if row[0] == helper._SHORT else s.dist_to(targ)))
+            pruned += len(rows) - len(kept)
+        self.assertTrue(pruned > 0)
+
+    def test_nav_time(self):
+        for analytic in (False, True):
+            start_time = time.process_time()
+            for frame in CORPUS_FRAMES:
+                replay(*frame, analytic=analytic)
+            end_time = time.process_time()
+            print(str(end_time - start_time))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from ..game_map import Map
+from ..entity import Ship
+from .frames import random_frame
+import time
+import copy
+
+class Test_Parse(unittest.TestCase):
+    def setUp(self):
+        self.frame = random_frame(1)
+
+    def test_parse(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(self.frame)
+        self.assertTrue(len(gmap.all_players()) == 4)
+        self.assertTrue(len(gmap.all_ships()) == 600)
+        self.assertTrue(len(gmap.all_planets()) == 24)
+        for p in gmap.all_planets():
+            for s in p.all_docked_ships():
+                self.assertTrue(s.owner == p.owner)
+                self.assertTrue(s.planet == p)
+                self.assertTrue(s.docking_status != Ship.DockingStatus.UNDOCKED)
+
+    def test_accessors(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(self.frame)
+        ships = gmap.en_uships()
+        self.assertTrue(gmap.en_uships() is ships)
+        self.assertTrue(isinstance(ships, tuple))
+        self.assertTrue(list(ships) == [s for s in gmap.all_ships() if s.owner != gmap.get_me() and s.can_atk()])
+
+        gmap.remove_ship(ships[0])
+        self.assertTrue(ships[0] not in gmap.en_uships())
+        self.assertTrue(len(gmap.en_uships()) == len(ships) - 1)
+        self.assertTrue(len(gmap.snapshot()) == len(gmap.all_entities()))
+
+    def test_update(self):
+        frame_a = ("2 0 2 0 10.0 10.0 255 0.0 0.0 0 0 0 0 1 20.0 20.0 255 0.0 0.0 2 0 5 0"
+                   " 1 1 2 30.0 30.0 200 0.0 0.0 0 0 0 0"
+                   " 2 0 50.0 50.0 2000 5.0 3 0 1500 1 0 1 1 1 80.0 80.0 2000 4.0 2 0 1500 0 0 0")
+        frame_b = ("2 0 2 0 17.0 10.0 255 0.0 0.0 0 0 0 0 1 20.0 20.0 255 0.0 0.0 2 0 5 0"
+                   " 1 1 3 60.0 60.0 255 0.0 0.0 0 0 0 0"
+                   " 1 0 50.0 50.0 2000 5.0 3 6 1494 1 0 1 1")
+        gmap = Map(0, 100, 100)
+        gmap._update(frame_a)
+        ship = gmap.get_me().get_ship(0)
+        planet = gmap.get_planet(0)
+        gmap._update(frame_b)
+
+        self.assertTrue(gmap.get_me().get_ship(0) is ship)
+        self.assertTrue(gmap.get_planet(0) is planet)
+        self.assertTrue(ship.loc.x == 17.0)
+        self.assertTrue(planet.remaining_resources == 1494)
+        self.assertTrue(planet.all_docked_ships() == [gmap.get_me().get_ship(1)])
+        self.assertTrue(gmap.spawned_ship_ids == {3})
+        self.assertTrue(gmap.destroyed_ship_ids == {2})
+        self.assertTrue(gmap.destroyed_planet_ids == {1})
+
+        fresh = Map(0, 100, 100)
+        fresh._parse(frame_b)
+        self.assertTrue([(s.id, s.loc, s.hp, s.docking_status, s.owner.id) for s in gmap.all_ships()] ==
+                        [(s.id, s.loc, s.hp, s.docking_status, s.owner.id) for s in fresh.all_ships()])
+
+    def test_fork(self):
+        gmap = Map(0, 384, 256)
+        gmap._update(self.frame)
+        fork = gmap.fork()
+        self.assertTrue([(s.id, s.loc, s.hp, s.docking_status, s.owner.id) for s in fork.all_ships()] ==
+                        [(s.id, s.loc, s.hp, s.docking_status, s.owner.id) for s in gmap.all_ships()])
+        self.assertTrue([(p.id, p.owner and p.owner.id, [s.id for s in p.all_docked_ships()]) for p in fork.all_planets()] ==
+                        [(p.id, p.owner and p.owner.id, [s.id for s in p.all_docked_ships()]) for p in gmap.all_planets()])
+        players = set(fork.all_players())
+        planets = set(fork.all_planets())
+        ships = set(fork.all_ships())
+        self.assertTrue(all(s.owner in players and (s.planet is None or s.planet in planets) for s in ships))
+        self.assertTrue(all(p.owner in players and set(p.all_docked_ships()) <= ships for p in fork.my_planets()))
+
+        hp = gmap.my_ships()[0].hp
+        ship = fork.my_ships()[0]
+        ship.hp = hp + 1
+        fork.remove_ship(ship)
+        self.assertTrue(len(fork.all_ships()) == 599 and len(gmap.all_ships()) == 600)
+        self.assertTrue(gmap.my_ships()[0].hp == hp)
+
+    def test_fork_time(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(self.frame)
+        start_time = time.process_time()
+        for _ in range(20):
+            gmap.fork()
+        end_time = time.process_time()
+        print(str((end_time - start_time)/20))
+        start_time = time.process_time()
+        copy.deepcopy(gmap)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+
+    def test_parse_time(self):
+        gmap = Map(0, 384, 256)
+        start_time = time.process_time()
+        for _ in range(20):
+            gmap._parse(self.frame)
+        end_time = time.process_time()
+        print(str((end_time - start_time)/20))
+        self.assertTrue(len(gmap.all_ships()) == 600)
+
+    def test_update_time(self):
+        gmap = Map(0, 384, 256)
+        start_time = time.process_time()
+        for _ in range(20):
+            gmap._update(self.frame)
+        end_time = time.process_time()
+        print(str((end_time - start_time)/20))
+        self.assertTrue(len(gmap.all_ships()) == 600)
+
+if __name__ == '__main__':
+    unittest.main()
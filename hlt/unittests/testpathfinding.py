@@ -1,6 +1,10 @@
 import unittest
 from ..game_map import Map
-from ..pathfinding import Graph
+from ..pathfinding import Graph, FlowField
+from ..entity import Position
+from ..geom import Point
+from .. import helper
+from .frames import random_frame
 import time
 
 class Test_Pathfinding(unittest.TestCase):
@@ -16,5 +20,97 @@ class Test_Pathfinding(unittest.TestCase):
         print(str(end_time - start_time))
         self.assertTrue(len(graph.nodes) == self.map.width*self.map.height)
 
+    def test_nodes(self):
+        graph = Graph(self.map, size=2)
+        self.assertTrue(len(graph.nodes) == 50*50)
+        self.assertTrue(Point(2, 4) in graph.nodes)
+        self.assertFalse(Point(3, 4) in graph.nodes)
+        self.assertFalse(Point(100, 4) in graph.nodes)
+        node = graph.nodes[Point(0, 4)]
+        self.assertTrue(sorted((n.loc.x, n.loc.y) for n in node.adj) == [(0, 2), (0, 6), (2, 4)])
+        self.assertTrue(graph.nodes[Point(2, 4)] in node.adj)
+        self.assertTrue(len(list(graph.nodes)) == len(graph.nodes))
+
+    def test_level(self):
+        gmap, ship, planet = self.wall()
+        graph = Graph(gmap, size=4)
+        fine = graph.level(1)
+        self.assertTrue(fine.level(4) is graph)
+        self.assertTrue(bytes(fine.blocked) == bytes(Graph(gmap).blocked))
+        self.assertTrue(fine.route(ship.loc, planet) == Graph(gmap).route(ship.loc, planet))
+
+    def test_init_time(self):
+        gmap = Map(0, 384, 256)
+        gmap._parse(random_frame(1, num_planets=28))
+        start_time = time.process_time()
+        for _ in range(10):
+            Graph(gmap)
+        end_time = time.process_time()
+        print(str((end_time - start_time)/10))
+
+    def wall(self):
+        # A wall of planets between the ship and its target, with the ship boxed in above and below
+        planets = [(60, y, 4.5) for y in range(14, 90, 8)] + [(50, 62, 4), (50, 38, 4), (95, 50, 5)]
+        tokens = ["1 0 1 0 50.0 50.0 255 0.0 0.0 0 0 0 0", str(len(planets))]
+        for k, (x, y, r) in enumerate(planets):
+            tokens.append("{} {} {} 2000 {} 3 0 1500 0 0 0".format(k, x, y, r))
+        gmap = Map(0, 120, 120)
+        gmap._parse(" ".join(tokens))
+        return gmap, gmap.get_me().get_ship(0), gmap.get_planet(len(planets) - 1)
+
+    def test_blocked(self):
+        gmap, ship, planet = self.wall()
+        graph = Graph(gmap, size=2)
+        self.assertTrue(graph.blocked[graph.cell(Point(60, 14))])
+        self.assertTrue(graph.blocked[graph.cell(Point(64, 14))])
+        self.assertFalse(graph.blocked[graph.cell(Point(66, 14))])
+        self.assertFalse(graph.blocked[graph.cell(ship.loc)])
+
+    def test_path(self):
+        gmap, ship, planet = self.wall()
+        graph = Graph(gmap)
+        self.assertTrue(graph.path(ship.loc, planet.loc) is None)
+        goal = Point(100, 60)
+        waypoints = graph.path(ship.loc, goal)
+        self.assertTrue(waypoints[-1] == goal)
+        for p, q in zip([ship.loc] + waypoints, waypoints):
+            self.assertTrue(graph.visible(p, q))
+        self.assertFalse(graph.visible(ship.loc, goal))
+
+    def test_route(self):
+        gmap, ship, planet = self.wall()
+        self.assertTrue(helper.nav(ship, ship.closest_pt_to(planet), gmap, None) == (None, None))
+        graph = Graph(gmap)
+        start_time = time.process_time()
+        waypoints = graph.route(ship.loc, planet)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+        self.assertTrue(Position(waypoints[-1]).dist_to(planet) <= planet.radius + 4)
+        self.assertTrue(graph.route(ship.loc, planet) is waypoints)
+        cmd, move = helper.nav(ship, Position(waypoints[0]), gmap, None)
+        self.assertTrue(cmd is not None)
+
+    def test_flow_field(self):
+        gmap, ship, planet = self.wall()
+        graph = Graph(gmap, size=2)
+        start_time = time.process_time()
+        field = FlowField(graph, planet)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+        self.assertTrue(field.waypoint(Point(105, 50)) is None)
+        self.assertTrue(field.distance(Point(105, 50)) == 0)
+        self.assertTrue(field.distance(ship.loc) > ship.dist_to(planet) - planet.radius - 4)
+        # Following the waypoints leads round the wall to where the planet is in sight
+        p = ship.loc
+        hops = 0
+        while field.waypoint(p) is not None:
+            q = field.waypoint(p)
+            self.assertTrue(graph.visible(p, q))
+            self.assertTrue(field.distance(q) < field.distance(p))
+            p = q
+            hops += 1
+        self.assertTrue(0 < hops < 10)
+        self.assertTrue(graph.visible(p, Position(p).closest_pt_to(planet).loc))
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
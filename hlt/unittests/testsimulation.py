@@ -0,0 +1,81 @@
+import unittest
+import time
+from ..game_map import Map
+from ..simulation import State, UNDOCKED, DOCKING, DOCKED
+from ..constants import (BASE_SHIP_HEALTH, EXPLOSION_RADIUS, MAX_SHIP_HEALTH, DOCK_TURNS, MAX_SPEED, PRODUCTION_PER_SHIP, BASE_PRODUCTIVITY,
+                         WEAPON_DAMAGE)
+from .frames import random_frame
+
+
+def state(frame, width=200, height=200):
+    gmap = Map(0, width, height)
+    gmap._parse(frame)
+    return State.from_map(gmap)
+
+
+class Test_State(unittest.TestCase):
+    def test_thrust(self):
+        s = state("1 0 1 0 50.0 50.0 255 0.0 0.0 0 0 0 0 0")
+        s.step(["t 0 7 90"])
+        self.assertAlmostEqual(s.x[0], 50)
+        self.assertAlmostEqual(s.y[0], 57)
+        s.step(["t 0 20 0"])
+        self.assertAlmostEqual(s.x[0], 50 + MAX_SPEED)
+
+    def test_collisions(self):
+        # Two ships meeting head on, and a third flying into a planet
+        s = state("2 0 2 0 50.0 50.0 255 0.0 0.0 0 0 0 0 1 100.0 100.0 255 0.0 0.0 0 0 0 0 "
+                  "1 1 2 60.0 50.0 200 0.0 0.0 0 0 0 0 "
+                  "1 0 100.0 110.0 2000 5.0 3 0 1500 0 0 0")
+        s.step(["t 0 7 0", "t 2 7 180", "t 1 7 90"])
+        self.assertEqual(s.ids, [0])
+        self.assertEqual(s.hp[0], 55)
+        self.assertEqual(s.php[0], 2000 - 255)
+
+    def test_weapons(self):
+        s = state("2 0 1 0 50.0 50.0 255 0.0 0.0 0 0 0 0 1 1 1 55.0 50.0 255 0.0 0.0 0 0 0 0 0")
+        s.step()
+        self.assertEqual(list(s.hp), [255 - WEAPON_DAMAGE]*2)
+        s.step()
+        self.assertEqual(list(s.hp), [255 - 2*WEAPON_DAMAGE]*2)
+
+    def test_dock_and_produce(self):
+        s = state("1 0 1 0 50.0 52.0 255 0.0 0.0 0 0 0 0 1 0 50.0 60.0 2000 5.0 3 0 1500 0 0 0")
+        s.step(["d 0 0"])
+        self.assertEqual((s.status[0], s.powner[0]), (DOCKING, 0))
+        for _ in range(DOCK_TURNS - 1):
+            s.step()
+        self.assertEqual(s.status[0], DOCKED)
+        turns = PRODUCTION_PER_SHIP//BASE_PRODUCTIVITY
+        after = s.simulate([[]]*turns)
+        self.assertEqual(after.ids, [0, 1])
+        self.assertEqual((after.status[1], after.owner[1], after.hp[1]), (UNDOCKED, 0, BASE_SHIP_HEALTH))
+        # Simulating leaves the original alone
+        self.assertEqual(s.ids, [0])
+        s.step(["u 0"])
+        for _ in range(DOCK_TURNS):
+            s.step()
+        self.assertEqual((s.status[0], s.planet[0], s.powner[0]), (UNDOCKED, -1, -1))
+
+    def test_explosion(self):
+        s = state("1 0 2 0 50.0 44.0 255 0.0 0.0 0 0 0 0 1 50.0 70.0 255 0.0 0.0 0 0 0 0 "
+                  "1 0 50.0 50.0 100 5.0 3 0 1500 0 0 0")
+        s.step(["t 0 7 90"])
+        self.assertEqual(s.ids, [1])
+        self.assertAlmostEqual(s.hp[0], 255 - MAX_SHIP_HEALTH*(1 - 15/EXPLOSION_RADIUS))
+
+    def test_rollout_time(self):
+        s = state(random_frame(1), 384, 256)
+        queues = [["t {} 7 {}".format(sid, (sid*37 + turn*11) % 360) for sid in s.ids] for turn in range(10)]
+        start_time = time.process_time()
+        s.simulate(queues)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+        start_time = time.process_time()
+        for _ in range(100):
+            s.clone()
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from ..game_map import Map
+from .frames import random_frame
+
+class Test_Snapshot(unittest.TestCase):
+    def setUp(self):
+        self.map = Map(0, 384, 256)
+        self.map._parse(random_frame(2, ships_per_player=40))
+        self.snap = self.map.snapshot()
+
+    def test_columns(self):
+        self.assertTrue(len(self.snap) == len(self.map.all_ships()) + len(self.map.all_planets()))
+        for i, e in enumerate(self.snap.entities):
+            self.assertTrue(self.snap.row(e) == i)
+            self.assertTrue((self.snap.x[i], self.snap.y[i]) == (e.loc.x, e.loc.y))
+        self.assertTrue(self.map.snapshot() is self.snap)
+
+    def test_select(self):
+        rows = self.snap.select(not_owner=0, undocked=True)
+        self.assertTrue([self.snap.entities[i] for i in rows] == list(self.map.en_uships()))
+        rows = self.snap.select(ships=False, planets=True)
+        self.assertTrue([self.snap.entities[i] for i in rows] == list(self.map.all_planets()))
+
+    def test_within(self):
+        s = self.map.my_ships()[0]
+        rows = self.snap.within(s.loc.x, s.loc.y, 30)
+        self.assertTrue([self.snap.entities[i] for i in rows] ==
+                        [e for e in self.map.all_entities() if s.dist_to(e) <= 30])
+        nearest = self.snap.nearest(s.loc.x, s.loc.y, 3)
+        self.assertTrue(self.snap.entities[nearest[0]] == s)
+        self.assertTrue(sorted(self.snap.dists(s.loc.x, s.loc.y))[:3] ==
+                        [s.dist_to(self.snap.entities[i]) for i in nearest])
+
+    def test_dist_matrix(self):
+        a = self.map.my_ships()[:5]
+        b = self.map.en_ships()[:7]
+        matrix = self.map.snapshot().dist_matrix(self.snap.rows(a), self.snap.rows(b))
+        self.assertTrue([list(row) for row in matrix] == [[s.dist_to(t) for t in b] for s in a])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import random
+from ..game_map import Map
+from ..geom import Point
+from .. import spatial
+from .frames import random_frame
+
+class Test_Spatial(unittest.TestCase):
+    def setUp(self):
+        self.map = Map(0, 384, 256)
+        self.map._parse(random_frame(3, ships_per_player=60))
+        self.me = self.map.get_me()
+        self.rng = random.Random(3)
+
+    def test_within(self):
+        is_en_uship = spatial.ships(enemy_of=self.me, undocked=True)
+        for _ in range(50):
+            p = Point(self.rng.random()*384, self.rng.random()*256)
+            r = self.rng.random()*40
+            self.assertTrue(self.map.within(p, r, is_en_uship) ==
+                            [t for t in self.map.en_uships() if (t.loc - p).norm() <= r])
+            self.assertTrue(self.map.within(p, r, spatial.planets(), surface=True) ==
+                            [t for t in self.map.all_planets() if (t.loc - p).norm() - t.radius <= r])
+
+    def test_nearest(self):
+        is_my_dship = spatial.ships(owner=self.me, undocked=False)
+        for _ in range(50):
+            p = Point(self.rng.random()*384, self.rng.random()*256)
+            self.assertTrue(self.map.nearest(p, 5, is_my_dship) ==
+                            sorted(self.map.my_dships(), key=lambda t:(t.loc - p).norm())[:5])
+            found = [e for _, e in self.map.spatial().iter_nearest(p)]
+            self.assertTrue(found == sorted(self.map.all_entities(), key=lambda t:(t.loc - p).norm()))
+
+if __name__ == '__main__':
+    unittest.main()
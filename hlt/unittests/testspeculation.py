@@ -0,0 +1,67 @@
+import unittest
+import logging
+import threading
+import time
+from ..networking import Game
+from ..transport import LocalTransport
+from .frames import random_frame
+
+
+class SlowTransport(LocalTransport):
+    """
+    Serves each frame after a delay, like an engine waiting on the other players.
+    """
+    def __init__(self, lines, delay):
+        super().__init__(lines)
+        self.delay = delay
+
+    def read_line(self):
+        time.sleep(self.delay)
+        return super().read_line()
+
+
+class Test_Speculation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Keep Game from opening a log file
+        logging.getLogger().addHandler(logging.NullHandler())
+
+    def game(self, frames, delay=0.0):
+        return Game("bot", incremental=True, transport=SlowTransport(["0", "384 256"] + frames, delay))
+
+    def test_result(self):
+        frame = random_frame(2, ships_per_player=20)
+        game = self.game([frame, frame, frame, random_frame(3, ships_per_player=25)], .05)
+        gmap = game.update_map()
+        ids = lambda m: sorted(s.id for s in m.all_ships())
+        forks = []
+        game.speculate(lambda fork, stop: forks.append(fork) or ids(fork), lambda result, real: result == ids(real))
+        self.assertTrue(game.speculation() is None)
+
+        self.assertTrue(game.update_map() is gmap)
+        self.assertTrue(game.speculation() == ids(gmap))
+        self.assertTrue(forks[0] is not gmap)
+
+        game.speculate(lambda fork, stop: ids(fork), lambda result, real: result == ids(real))
+        game.update_map()
+        self.assertTrue(game.speculation() is None)
+
+    def test_stop(self):
+        frame = random_frame(2, ships_per_player=20)
+        game = self.game([frame, frame, frame])
+        game.update_map()
+        started = threading.Event()
+
+        def work(fork, stop):
+            started.set()
+            while not stop.is_set():
+                time.sleep(.001)
+            return None
+        game.speculate(work)
+        started.wait(1)
+        game.update_map()
+        self.assertTrue(game.speculation(wait=1) is None)
+        self.assertTrue(game._last_speculation.done())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import random
+import time
+from collections import OrderedDict
+from ..game_map import Map
+from ..entity import Planet
+from ..targeting import MoveQueue
+from ..constants import WEAPON_RADIUS
+from .. import helper
+from .frames import random_frame
+
+class Test_MoveQueue(unittest.TestCase):
+    def setUp(self):
+        self.map = Map(0, 384, 256)
+        self.map._parse(random_frame(11, ships_per_player=60))
+        self.targets = list(self.map.unowned_planets()) + list(self.map.en_ships())
+        self.threat = set(self.map.en_uships()[::7])
+
+    def cost(self, s, e):
+        if type(e) == Planet:
+            return helper.to_turns(s.dist_to(s.closest_pt_to(e))) + 2
+        d = helper.to_turns(s.dist_to(e) - WEAPON_RADIUS)
+        if e in self.threat or not e.can_atk():
+            d -= 1
+        return d
+
+    def queue(self, pending):
+        return MoveQueue(self.map.my_uships(), self.targets, self.cost, self.map.spatial(), self.map.en_ships(),
+                         lambda dist: helper.to_turns(dist - WEAPON_RADIUS) - 1, pending)
+
+    def sorted_pairs(self):
+        pairs = {(s,e): self.cost(s,e) for s in self.map.my_uships() for e in self.targets}
+        return OrderedDict(sorted(pairs.items(), key=lambda t:t[1]))
+
+    def test_order(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            pending = set(self.map.my_uships())
+            expected = []
+            for (s,e), d in self.sorted_pairs().items():
+                if s in pending:
+                    expected.append((s, e, d))
+                    if rng.random() < .3:
+                        pending.discard(s)
+
+            rng = random.Random(seed)
+            pending = set(self.map.my_uships())
+            found = []
+            for s, e, d in self.queue(pending):
+                self.assertTrue(s in pending)
+                found.append((s, e, d))
+                if rng.random() < .3:
+                    pending.discard(s)
+            self.assertEqual(found, expected)
+
+    def test_first(self):
+        queue = self.queue(None)
+        for s in self.map.my_uships():
+            best = min(range(len(self.targets)), key=lambda j: (self.cost(s, self.targets[j]), j))
+            self.assertEqual(queue.first[s], (self.cost(s, self.targets[best]), self.targets[best]))
+        self.assertEqual(len(list(queue)), len(self.map.my_uships())*len(self.targets))
+
+    def test_queue_time(self):
+        start_time = time.process_time()
+        pending = set(self.map.my_uships())
+        for s, e, d in self.queue(pending):
+            pending.discard(s)
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+        start_time = time.process_time()
+        self.sorted_pairs()
+        end_time = time.process_time()
+        print(str(end_time - start_time))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import io
+import logging
+import socket
+import time
+from ..game_map import Map
+from ..networking import Game
+from ..transport import LocalTransport, PipeTransport, SocketTransport
+from .frames import random_frame
+
+
+class Test_Transport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Keep Game from opening a log file
+        logging.getLogger().addHandler(logging.NullHandler())
+        cls.frame = random_frame(1)
+
+    def test_bytes_parse(self):
+        text = Map(0, 384, 256)
+        text._parse(self.frame)
+        raw = Map(0, 384, 256)
+        raw._parse(self.frame.encode())
+        self.assertTrue([(s.id, s.loc, s.hp, s.docking_status, s.owner.id) for s in raw.all_ships()] ==
+                        [(s.id, s.loc, s.hp, s.docking_status, s.owner.id) for s in text.all_ships()])
+        self.assertTrue([(p.id, p.loc, p.hp, p.remaining_resources) for p in raw.all_planets()] ==
+                        [(p.id, p.loc, p.hp, p.remaining_resources) for p in text.all_planets()])
+
+    def test_local_game(self):
+        transport = LocalTransport(["0", "384 256", self.frame],
+                                   engine=lambda line: [self.frame] if len(transport.sent) < 3 else [])
+        game = Game("bot", incremental=True, transport=transport)
+        self.assertTrue(len(game.initial_map.all_ships()) == 600)
+        gmap = game.update_map()
+        game.send_command_queue([s.thrust(7, 90) for s in gmap.my_ships()[:2]])
+        ships = gmap.my_ships()
+        self.assertTrue(transport.sent == ["bot", "t {} 7 90t {} 7 90".format(ships[0].id, ships[1].id)])
+
+    def test_pipe(self):
+        out = io.BytesIO()
+        transport = PipeTransport(io.BytesIO(b"0\n384 256\n"), out)
+        self.assertTrue(transport.read_line() == b"0")
+        self.assertTrue(transport.read_line() == b"384 256")
+        self.assertTrue(transport.read_line() == b"")
+        transport.write_line("t 0 7 90")
+        self.assertTrue(out.getvalue() == b"t 0 7 90\n")
+
+    def test_socket(self):
+        ours, engine = socket.socketpair()
+        transport = SocketTransport(ours)
+        engine.sendall(b"1\n")
+        self.assertTrue(transport.read_line() == b"1")
+        transport.write_line("bot")
+        self.assertTrue(engine.recv(16) == b"bot\n")
+        transport.close()
+        engine.close()
+
+    def test_io_time(self):
+        data = (self.frame + "\n")*20
+        commands = ["t {} 7 {}".format(sid, sid % 360) for sid in range(150)]
+
+        start_time = time.process_time()
+        stdin = io.TextIOWrapper(io.BytesIO(data.encode()))
+        stdout = io.TextIOWrapper(io.BytesIO())
+        for _ in range(20):
+            Map(0, 384, 256)._parse(stdin.readline().rstrip('\n'))
+            for command in commands:
+                stdout.write(command)
+            stdout.write('\n')
+            stdout.flush()
+        end_time = time.process_time()
+        print(str((end_time - start_time)/20))
+
+        start_time = time.process_time()
+        transport = PipeTransport(io.BytesIO(data.encode()), io.BytesIO())
+        for _ in range(20):
+            Map(0, 384, 256)._parse(transport.read_line())
+            transport.write_line(''.join(commands))
+        end_time = time.process_time()
+        print(str((end_time - start_time)/20))
+
+if __name__ == '__main__':
+    unittest.main()